@@ -0,0 +1,454 @@
+import aiohttp
+import asyncio
+import logging
+import queue
+import threading
+import time
+from contextlib import aclosing, asynccontextmanager
+from itertools import islice
+
+from horoscope_api.metrics import (
+    DETAIL_PAGES,
+    FETCH_BYTES,
+    FETCHES,
+    METRO_SECONDS,
+    PARSE_FAILURES,
+    STAGE_SECONDS,
+    fetch_outcome,
+)
+
+from .detail_memo import DetailMemo
+from .incremental import is_known
+from .page_cache import get_page_cache
+from .records import details_error
+from .utils import (
+    SULEKHA_BASE_URL,
+    SULEKHA_HEADERS,
+    ListingError,
+    merge_event_details,
+    parse_event_details,
+    parse_sulekha_listing,
+)
+
+logger = logging.getLogger(__name__)
+
+# Crawl-wide limits: total open requests, open requests per host and the
+# steady request rate (requests per second) with a small burst allowance.
+MAX_CONCURRENCY = 10
+MAX_CONCURRENCY_PER_HOST = 6
+REQUESTS_PER_SECOND = 4
+BURST = 4
+REQUEST_TIMEOUT = 15
+
+
+# Scraped events buffered between the crawl and the database writer; the
+# crawl pauses when the writer falls this far behind
+STREAM_BUFFER = 200
+# Seconds a blocked put waits before checking whether the reader went away
+STOP_POLL_INTERVAL = 0.5
+
+
+def listing_events(categorized_events):
+    """ Flat list of the cards in a section -> events mapping """
+    return [event for section_events in categorized_events.values() for event in section_events]
+
+
+async def queue_put(results, item, stop=None):
+    """
+    Put on a bounded queue.Queue or multiprocessing queue without blocking
+    the event loop. With a threading.Event `stop`, gives up and returns False
+    once it is set while the queue stays full.
+    """
+    try:
+        results.put_nowait(item)
+        return True
+    except queue.Full:
+        pass
+    if stop is None:
+        await asyncio.to_thread(results.put, item)
+        return True
+    while not stop.is_set():
+        try:
+            await asyncio.to_thread(results.put, item, timeout=STOP_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by every request of a crawl.
+    Replaces the random per-metro sleeps of the synchronous scraper.
+    """
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=BURST):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """ Wait until a token is available and consume it """
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class AsyncSulekhaScraper:
+    """
+    Fetches Sulekha metro listings and their event detail pages concurrently
+    over one aiohttp session, bounded by a global and a per-host cap. At
+    most detail_window detail fetches of a metro are scheduled at a time.
+    With `known` (see incremental.load_known_cards) the detail pages of
+    unchanged cards are skipped and the events marked as stored_details.
+    Detail pages go through a DetailMemo, so an event listed on several
+    metros is fetched and parsed once per scraper. Listings are fetched from
+    base_url (default SULEKHA_BASE_URL).
+    """
+
+    def __init__(
+        self,
+        session,
+        concurrency=MAX_CONCURRENCY,
+        rate_limiter=None,
+        timeout=REQUEST_TIMEOUT,
+        cache=None,
+        known=None,
+        memo=None,
+        base_url=None,
+    ):
+        self.session = session
+        self.base_url = base_url or SULEKHA_BASE_URL
+        self.cache = cache
+        self.known = known
+        self.memo = memo if memo is not None else DetailMemo()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        # Enough queued fetches to keep every connection busy, not one task per card
+        self.detail_window = 2 * concurrency
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async def request(self, url, headers=None):
+        """
+        GET a URL and return (status, headers, body), raising on network
+        errors and 4xx/5xx statuses
+        """
+        await self.rate_limiter.acquire()
+        async with self.semaphore:
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                async with self.session.get(
+                    url, headers={**SULEKHA_HEADERS, **(headers or {})}, timeout=self.timeout
+                ) as response:
+                    outcome = fetch_outcome(response.status)
+                    response.raise_for_status()
+                    body = await response.text()
+                    FETCH_BYTES.inc(len(body), source="sulekha")
+                    return response.status, response.headers, body
+            finally:
+                FETCHES.inc(source="sulekha", outcome=outcome)
+                STAGE_SECONDS.observe(time.perf_counter() - started, source="sulekha", stage="fetch")
+
+    async def fetch(self, url):
+        """ Fetch page content """
+        _, _, body = await self.request(url)
+        return body
+
+    async def fetch_parsed(self, url, parse):
+        """
+        Async counterpart of page_cache.fetch_parsed. Parsing and the page
+        cache's disk reads and writes run in worker threads so they do not
+        stall the other requests in flight.
+        """
+        cache = self.cache
+        if cache is None:
+            return await asyncio.to_thread(parse, await self.fetch(url))
+
+        entry, fresh = await asyncio.to_thread(cache.lookup, url)
+        if entry is not None and fresh:
+            cache.count("hits")
+            return entry["parsed"]
+
+        status, headers, body = await self.request(url, cache.conditional_headers(entry))
+        if entry is not None and status == 304:
+            cache.count("revalidated")
+            await asyncio.to_thread(cache.revalidated, url, entry, headers)
+            return entry["parsed"]
+
+        cache.count("misses")
+        parsed = await asyncio.to_thread(parse, body)
+        await asyncio.to_thread(cache.store, url, body, headers, parsed)
+        return parsed
+
+    async def scrape_metro(self, city):
+        """
+        Async counterpart of utils.scrape_sulekha_events; returns the same
+        section -> events mapping, or {"error": ...} if the listing fails.
+        """
+        with METRO_SECONDS.time(metro=city, stage="scrape"):
+            try:
+                categorized_events = await self.fetch_listing(city)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ListingError) as e:
+                logger.error(f"Error fetching events: {e}")
+                return {"error": str(e) or e.__class__.__name__}
+
+            async for _ in self.enrich(city, listing_events(categorized_events)):
+                pass
+            return categorized_events
+
+    async def stream_metro(self, city):
+        """
+        Streaming counterpart of scrape_metro: an async iterator over
+        ("event", city, event) items as each event's details arrive, ending
+        with ("done", city, error or None)
+        """
+        started = time.perf_counter()
+        try:
+            try:
+                categorized_events = await self.fetch_listing(city)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ListingError) as e:
+                logger.error(f"Error fetching events: {e}")
+                yield "done", city, str(e) or e.__class__.__name__
+                return
+
+            async for event in self.enrich(city, listing_events(categorized_events)):
+                yield "event", city, event
+            yield "done", city, None
+        finally:
+            METRO_SECONDS.observe(time.perf_counter() - started, metro=city, stage="scrape")
+
+    async def fetch_listing(self, city):
+        """ Section -> listing cards (without details) of one metro """
+        url = f"{self.base_url}/{city.lower()}"
+        return await self.fetch_parsed(
+            url, lambda html: parse_sulekha_listing(html, city, fetch_details=False, base_url=self.base_url)
+        )
+
+    async def enrich(self, city, events):
+        """
+        Fetch the detail pages of listing cards concurrently, yielding each
+        event with its details merged in as soon as they arrive. Cards that
+        are already stored unchanged (incremental mode) are yielded first,
+        marked as stored_details and without a fetch.
+        """
+        to_fetch = []
+        known = 0
+        for event in events:
+            if is_known(event, self.known):
+                event.stored_details = True
+                known += 1
+                yield event
+            else:
+                to_fetch.append(event)
+        if self.known is not None:
+            DETAIL_PAGES.inc(known, result="reused")
+            logger.info(f"{city}: fetching details of {len(to_fetch)} new or changed events out of {known + len(to_fetch)}")
+
+        async def fetch(event):
+            return merge_event_details(event, await self.fetch_event_details(event.event_url))
+
+        waiting = iter(to_fetch)
+        pending = set()
+        try:
+            while True:
+                for event in islice(waiting, self.detail_window - len(pending)):
+                    pending.add(asyncio.ensure_future(fetch(event)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    DETAIL_PAGES.inc(result="fetched")
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def fetch_event_details(self, link):
+        """ Async counterpart of utils.extract_event_details_inside_link """
+        try:
+            return await self.memo.aget(link, lambda url: self.fetch_parsed(url, parse_event_details))
+        except Exception as e:
+            logger.error(f"Error fetching event details: {e}")
+            if not isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)):
+                PARSE_FAILURES.inc(source="sulekha", kind="details")
+            return details_error()
+
+
+@asynccontextmanager
+async def open_scraper(
+    concurrency=MAX_CONCURRENCY,
+    per_host=MAX_CONCURRENCY_PER_HOST,
+    rate=REQUESTS_PER_SECOND,
+    burst=BURST,
+    known=None,
+    base_url=None,
+    cache_dir=None,
+):
+    """
+    AsyncSulekhaScraper over its own session, with the crawl-wide limits.
+    cache_dir defaults to the SULEKHA_PAGE_CACHE_DIR setting ("" disables
+    the page cache).
+    """
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        scraper = AsyncSulekhaScraper(
+            session,
+            concurrency=concurrency,
+            rate_limiter=TokenBucket(rate, burst),
+            cache=get_page_cache(cache_dir),
+            known=known,
+            base_url=base_url,
+        )
+        try:
+            yield scraper
+        finally:
+            scraper.memo.log_stats()
+
+
+async def iter_scrape_metros(
+    metros,
+    concurrency=MAX_CONCURRENCY,
+    per_host=MAX_CONCURRENCY_PER_HOST,
+    rate=REQUESTS_PER_SECOND,
+    burst=BURST,
+    known=None,
+    base_url=None,
+    cache_dir=None,
+):
+    """
+    Scrape several metros concurrently, yielding (metro, events) as each one
+    finishes. `known` enables incremental mode (see AsyncSulekhaScraper).
+    """
+    async with open_scraper(concurrency, per_host, rate, burst, known, base_url, cache_dir) as scraper:
+
+        async def scrape(metro):
+            return metro, await scraper.scrape_metro(metro)
+
+        for task in asyncio.as_completed([scrape(metro) for metro in metros]):
+            yield await task
+
+
+async def iter_stream_metros(
+    metros,
+    concurrency=MAX_CONCURRENCY,
+    per_host=MAX_CONCURRENCY_PER_HOST,
+    rate=REQUESTS_PER_SECOND,
+    burst=BURST,
+    known=None,
+    base_url=None,
+    cache_dir=None,
+):
+    """
+    Scrape several metros concurrently as one stream of the
+    AsyncSulekhaScraper.stream_metro items of all of them, in the order they
+    are produced. Every metro ends with exactly one ("done", metro, error).
+    """
+    metros = list(metros)
+    async with open_scraper(concurrency, per_host, rate, burst, known, base_url, cache_dir) as scraper:
+        items = asyncio.Queue(maxsize=STREAM_BUFFER)
+
+        async def pump(metro):
+            try:
+                async for item in scraper.stream_metro(metro):
+                    await items.put(item)
+            except Exception as e:
+                logger.exception(f"Failed to scrape {metro}")
+                await items.put(("done", metro, str(e) or e.__class__.__name__))
+
+        tasks = [asyncio.ensure_future(pump(metro)) for metro in metros]
+        try:
+            remaining = len(metros)
+            while remaining:
+                item = await items.get()
+                if item[0] == "done":
+                    remaining -= 1
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def scrape_metros_async(metros, **limits):
+    """
+    Scrape several metros concurrently; returns a metro slug -> events mapping
+    """
+    metros = list(metros)
+    results = {metro: events async for metro, events in iter_scrape_metros(metros, **limits)}
+    return {metro: results[metro] for metro in metros}
+
+
+def scrape_metros(metros, **limits):
+    """ Blocking entry point for scrape_metros_async, for sync callers """
+    return asyncio.run(scrape_metros_async(metros, **limits))
+
+
+_DONE = object()
+
+
+def _iterate_in_thread(iterate):
+    """
+    Blocking iterator over the async iterator iterate() run on its own event
+    loop in a background thread, so the caller can write to the database
+    (which must happen outside the event loop) while the crawl goes on. At
+    most STREAM_BUFFER items are buffered. When the caller stops early
+    (closes or drops the iterator) the crawl is cancelled instead of
+    blocking its thread on the full buffer.
+    """
+    results = queue.Queue(maxsize=STREAM_BUFFER)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=STOP_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def crawl():
+        async def produce():
+            async with aclosing(iterate()) as items:
+                async for item in items:
+                    if not await queue_put(results, item, stop):
+                        return
+
+        try:
+            asyncio.run(produce())
+        except BaseException as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    threading.Thread(target=crawl, name="sulekha-crawl", daemon=True).start()
+
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def scrape_metros_iter(metros, **limits):
+    """ Blocking iterator over (metro, events) in completion order """
+    return _iterate_in_thread(lambda: iter_scrape_metros(metros, **limits))
+
+
+def stream_metros_iter(metros, **limits):
+    """ Blocking iterator over the items of iter_stream_metros """
+    return _iterate_in_thread(lambda: iter_stream_metros(metros, **limits))
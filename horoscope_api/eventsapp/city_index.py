@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils.text import slugify
+
+from .models import Mastercity
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60 * 60
+
+MASTERCITY_FIELDS = ("mastercityid", "city", "state", "lat", "long", "geohash")
+
+
+def normalize_city_name(name):
+    """ "St. Louis " -> "st louis" """
+    return " ".join((name or "").lower().replace(".", " ").split())
+
+
+class MastercityIndex:
+    """
+    In-process index of the Mastercity table keyed by normalized city name and
+    by slug. The whole table is loaded once and reloaded after `ttl` seconds,
+    so resolving a city during ingestion does not touch the database. Misses
+    fall back to one case-insensitive query whose result (including "not
+    found") is kept until the next reload.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._by_name = {}
+        self._by_slug = {}
+        self._loaded_at = None
+
+    def _load(self):
+        by_name = {}
+        by_slug = {}
+        for record in Mastercity.objects.values(*MASTERCITY_FIELDS).order_by("id"):
+            name = normalize_city_name(record["city"])
+            if not name:
+                continue
+            by_name.setdefault(name, record)
+            by_slug.setdefault(slugify(record["city"]), record)
+
+        self._by_name = by_name
+        self._by_slug = by_slug
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(by_name)} Mastercity entries")
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            self._load()
+
+    def get(self, city_name):
+        """ Mastercity values for a city name or slug, or None if unknown """
+        name = normalize_city_name(city_name)
+        with self._lock:
+            self._ensure_loaded()
+            if name in self._by_name:
+                return self._by_name[name]
+            slug = slugify(city_name or "")
+            if slug in self._by_slug:
+                return self._by_slug[slug]
+
+            record = (
+                Mastercity.objects.filter(city__iexact=(city_name or "").strip())
+                .values(*MASTERCITY_FIELDS)
+                .first()
+            )
+            if record is None:
+                logger.warning(f"City not found in Mastercity: {city_name}")
+            self._by_name[name] = record
+            return record
+
+    def state_for(self, city_name):
+        record = self.get(city_name)
+        return record["state"] if record else None
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_mastercity_index():
+    """ Process-wide MastercityIndex, TTL from MASTERCITY_INDEX_TTL """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = MastercityIndex(ttl=getattr(settings, "MASTERCITY_INDEX_TTL", DEFAULT_TTL))
+        return _index
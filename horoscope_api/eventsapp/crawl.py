@@ -0,0 +1,210 @@
+import logging
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# City name (as stored in Mastercity) -> Sulekha metro slug.
+# Several cities share a metro page, e.g. "bay-area".
+CITY_METROS = {
+    "Austin": "austin-metro-area",
+    "Dallas": "dallas-fortworth-area",
+    "Houston": "houston-metro-area",
+    "Los Angeles": "los-angeles-metro-area",
+    "New York": "new-york-metro-area",
+    "Philadelphia": "philadelphia-metro-area",
+    "Miami": "miami-metro-area",
+    "San Francisco": "bay-area",
+    "Chicago": "chicago-metro-area",
+    "Boston": "boston-metro-area",
+    "Seattle": "seattle-metro-area",
+    "Denver": "denver-metro-area",
+    "Atlanta": "atlanta-metro-area",
+    "Phoenix": "phoenix-metro-area",
+    "San Diego": "san-diego-metro-area",
+    "Las Vegas": "las-vegas-metro-area",
+    "Portland": "portland-metro-area",
+    "Detroit": "detroit-metro-area",
+    "Baltimore": "baltimore-metro-area",
+    "Charlotte": "research-triangle-area",
+    "Minneapolis": "st-paul-metro-area",
+    "Tampa": "tampa-metro-area",
+    "St. Louis": "st-louis-metro-area",
+    "New Orleans": "new-orleans-metro-area",
+    "Salt Lake City": "ogden-metro-area",
+    "Indianapolis": "indianapolis-metro-area",
+    "Cleveland": "cleveland-metro-area",
+    "Cincinnati": "cincinnati-metro-area",
+    "Kansas City": "kansas-city-metro-area",
+    "Omaha": "omaha-metro-area",
+    "Oakland": "bay-area",
+    "Orlando": "orlando-metro-area",
+    "Sacramento": "sacramento-metro-area",
+    "Nashville": "nashville-metro-area",
+    "Milwaukee": "milwaukee-metro-area",
+    "Raleigh": "research-triangle-area",
+    "Memphis": "memphis-metro-area",
+    "Virginia Beach": "richmond-metro-area",
+    "Albuquerque": "albuquerque-metro-area",
+    "Tulsa": "dallas-fortworth-area",
+    "Fresno": "bay-area",
+    "Columbus": "cincinnati-metro-area",
+    "Wichita": "kansas-city-metro-area",
+    "Pittsburgh": "bay-area",
+    "Anchorage": "anchorage-metro-area",
+    "Honolulu": "honolulu-metro-area",
+    "Colorado Springs": "denver-metro-area",
+    "El Paso": "dallas-fortworth-area",
+    "Lexington": "lexington-metro-area",
+    "Reno": "sacramento-metro-area",
+    "Boise": "boise-metro-area",
+    "Spokane": "seattle-metro-area",
+    "Baton Rouge": "houston-metro-area",
+    "Des Moines": "des-moines-metro-area",
+    "Fort Worth": "dallas-fortworth-area",
+    "Jacksonville": "orlando-metro-area",
+    "Little Rock": "conway-metro-area",
+    "Madison": "madison-metro-area",
+    "Providence": "providence-metro-area",
+    "Richmond": "richmond-metro-area",
+    "Sioux Falls": "sioux-falls-metro-area",
+    "Springfield": "chicago-metro-area",
+    "Tucson": "phoenix-metro-area",
+    "Bakersfield": "los-angeles-metro-area",
+    "Chattanooga": "chattanooga-metro-area",
+    "Durham": "research-triangle-area",
+    "Fargo": "fargo-metro-area",
+    "Green Bay": "milwaukee-metro-area",
+    "Harrisburg": "philadelphia-metro-area",
+    "Lubbock": "dallas-fortworth-area",
+    "Mobile": "montgomery-metro-area",
+    "Modesto": "bay-area",
+    "Montgomery": "montgomery-metro-area",
+    "Newark": "new-jersey-area",
+    "Norfolk": "washington-metro-area",
+    "Olympia": "seattle-metro-area",
+    "Peoria": "chicago-metro-area",
+    "Rochester": "new-york-metro-area",
+    "Salem": "portland-metro-area",
+    "Santa Fe": "phoenix-metro-area",
+    "Syracuse": "new-york-metro-area",
+    "Topeka": "kansas-city-metro-area",
+    "Wilmington": "philadelphia-metro-area",
+    "Augusta": "atlanta-metro-area",
+    "Bismarck": "bismarck-metro-area",
+    "Cheyenne": "cheyenne-metro-area",
+    "Dover": "philadelphia-metro-area",
+    "Helena": "helena-mt",
+    "Jefferson City": "jefferson-city-mo",
+    "Lincoln": "kansas-city-metro-area",
+    "Montpelier": "montpelier-vt",
+    "Tallahassee": "orlando-metro-area",
+    "San Jose": "bay-area",
+    "Fort Lauderdale": "miami-metro-area",
+    "Riverside": "inland-empire-area",
+    "Corpus Christi": "houston-metro-area",
+    "Stockton": "bay-area",
+    "Santa Ana": "los-angeles-metro-area",
+    "St. Paul": "st-paul-metro-area",
+}
+
+
+def build_crawl_plan(city_metros=None):
+    """
+    Group cities by the Sulekha metro slug they map to, so every metro page
+    is scraped once and its events fanned out to all cities that share it.
+    Returns an ordered mapping of metro slug -> list of city names.
+    """
+    if city_metros is None:
+        city_metros = CITY_METROS
+
+    plan = OrderedDict()
+    for city_name, metro in city_metros.items():
+        if not city_name or not metro:
+            continue
+        plan.setdefault(metro.lower(), []).append(city_name)
+    return plan
+
+
+def run_crawl(crawl_plan=None, on_metro_done=None, processes=1, incremental=False):
+    """
+    Scrape every metro of the crawl plan as one stream of events and write
+    each event to the cities of its metro as it arrives, in batches (see
+    ingest.MetroEventWriter); rows no longer listed are deleted once a metro
+    is complete. With processes > 1 the metros are sharded across a process
+    pool and this process only writes to the database. With incremental=True
+    only new or changed events get their detail pages fetched; the others
+    reuse their stored details (see incremental.py).
+    on_metro_done(metro, city_names, counts, error) is called after each
+    metro. Returns the total inserted/updated/unchanged/removed counts.
+    """
+    from .async_scraper import stream_metros_iter
+    from .incremental import load_known_cards, with_stored_details
+    from .ingest import MetroEventWriter
+    from .sharding import scrape_metros_sharded
+
+    if crawl_plan is None:
+        crawl_plan = build_crawl_plan()
+
+    if processes and processes > 1:
+        known_for = None
+        if incremental:
+            # Each shard only gets the stored cards of its own metros' cities
+            def known_for(metros):
+                return load_known_cards(city for metro in metros for city in crawl_plan[metro])
+
+        stream = scrape_metros_sharded(crawl_plan.keys(), processes=processes, known_for=known_for)
+    else:
+        known = load_known_cards() if incremental else None
+        stream = stream_metros_iter(crawl_plan.keys(), known=known)
+    if incremental:
+        stream = with_stored_details(stream)
+
+    totals = Counter()
+    pending = set(crawl_plan)
+    writers = {}
+    failed = {}
+    for kind, metro, payload in stream:
+        if kind == "event":
+            if metro in failed:
+                continue
+            try:
+                writer = writers.get(metro)
+                if writer is None:
+                    writer = writers[metro] = MetroEventWriter(metro, crawl_plan[metro])
+                writer.add(payload)
+            except Exception as e:
+                logger.exception(f"Failed to ingest {metro}")
+                failed[metro] = str(e)
+                writers.pop(metro, None)
+            continue
+
+        pending.discard(metro)
+        city_names = crawl_plan[metro]
+        error = failed.pop(metro, None) or payload
+        counts = Counter()
+        try:
+            writer = writers.pop(metro, None) or MetroEventWriter(metro, city_names)
+            counts = writer.finish(error)
+        except Exception as e:
+            logger.exception(f"Failed to ingest {metro}")
+            error = str(e)
+
+        totals.update(counts)
+        if on_metro_done:
+            on_metro_done(metro, city_names, counts, error)
+
+    # Metros lost with a crashed shard; keep what was written, delete nothing
+    for metro in pending:
+        logger.error(f"No result for {metro}")
+        counts = Counter()
+        writer = writers.pop(metro, None)
+        if writer is not None:
+            try:
+                counts = writer.finish("Metro was not crawled")
+            except Exception:
+                logger.exception(f"Failed to ingest {metro}")
+        totals.update(counts)
+        if on_metro_done:
+            on_metro_done(metro, crawl_plan[metro], counts, "Metro was not crawled")
+
+    return totals
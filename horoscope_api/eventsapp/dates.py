@@ -0,0 +1,204 @@
+"""
+Typed start/end datetimes for Sulekha's free-text event dates.
+
+Listing cards show dates such as "Sat, Mar 15, 2025 07:00 PM",
+"Fri, Apr 4, 2025 - Sun, Apr 6, 2025" or "Sat, Mar 15, 2025 07:00 PM -
+10:00 PM", and sometimes "Sun, Sept 7, 2025", "Sat, 15 Mar 2025 07:00 PM",
+"... 07:00 PM onwards" or a trailing "(PST)".
+parse_event_date_range() turns them into naive local ISO strings
+(what the scraper stores in the parsed event) and typed_event_dates() makes
+them timezone-aware using the event's US state.
+"""
+
+import re
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+WEEKDAY_PREFIX = re.compile(r"^(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?,?\s*", re.IGNORECASE)
+RANGE_SEPARATOR = re.compile(r"\s+(?:-|–|—|to)\s+", re.IGNORECASE)
+# Trailing "onwards" and "(PST)"-style zone labels; the state gives the zone
+TRAILING_NOISE = re.compile(r"(?:\s*\([A-Za-z]{2,5}\)|\s+onwards?)+$", re.IGNORECASE)
+DATE_TIME = re.compile(
+    r"^(?P<date>[A-Za-z]{3,9}\.?\s+\d{1,2},?\s+\d{4}|\d{1,2}\s+[A-Za-z]{3,9}\.?,?\s+\d{4})"
+    r"(?:\s*,?\s*(?:at\s+)?(?P<time>\d{1,2}(?::\d{2})?\s*[AaPp]\.?[Mm]\.?))?$"
+)
+TIME_ONLY = re.compile(r"^(?P<time>\d{1,2}(?::\d{2})?\s*[AaPp]\.?[Mm]\.?)$")
+STATE_SUFFIX = re.compile(r",\s*([A-Z]{2})$")
+
+SEPT = re.compile(r"\bsept\b", re.IGNORECASE)
+
+DATE_FORMATS = ("%b %d %Y", "%B %d %Y", "%d %b %Y", "%d %B %Y")
+
+# Primary timezone of each state; events are listed in local wall-clock time
+STATE_TIMEZONES = {
+    "AL": ("Alabama", "America/Chicago"),
+    "AK": ("Alaska", "America/Anchorage"),
+    "AZ": ("Arizona", "America/Phoenix"),
+    "AR": ("Arkansas", "America/Chicago"),
+    "CA": ("California", "America/Los_Angeles"),
+    "CO": ("Colorado", "America/Denver"),
+    "CT": ("Connecticut", "America/New_York"),
+    "DE": ("Delaware", "America/New_York"),
+    "DC": ("District of Columbia", "America/New_York"),
+    "FL": ("Florida", "America/New_York"),
+    "GA": ("Georgia", "America/New_York"),
+    "HI": ("Hawaii", "Pacific/Honolulu"),
+    "ID": ("Idaho", "America/Boise"),
+    "IL": ("Illinois", "America/Chicago"),
+    "IN": ("Indiana", "America/Indiana/Indianapolis"),
+    "IA": ("Iowa", "America/Chicago"),
+    "KS": ("Kansas", "America/Chicago"),
+    "KY": ("Kentucky", "America/New_York"),
+    "LA": ("Louisiana", "America/Chicago"),
+    "ME": ("Maine", "America/New_York"),
+    "MD": ("Maryland", "America/New_York"),
+    "MA": ("Massachusetts", "America/New_York"),
+    "MI": ("Michigan", "America/Detroit"),
+    "MN": ("Minnesota", "America/Chicago"),
+    "MS": ("Mississippi", "America/Chicago"),
+    "MO": ("Missouri", "America/Chicago"),
+    "MT": ("Montana", "America/Denver"),
+    "NE": ("Nebraska", "America/Chicago"),
+    "NV": ("Nevada", "America/Los_Angeles"),
+    "NH": ("New Hampshire", "America/New_York"),
+    "NJ": ("New Jersey", "America/New_York"),
+    "NM": ("New Mexico", "America/Denver"),
+    "NY": ("New York", "America/New_York"),
+    "NC": ("North Carolina", "America/New_York"),
+    "ND": ("North Dakota", "America/Chicago"),
+    "OH": ("Ohio", "America/New_York"),
+    "OK": ("Oklahoma", "America/Chicago"),
+    "OR": ("Oregon", "America/Los_Angeles"),
+    "PA": ("Pennsylvania", "America/New_York"),
+    "RI": ("Rhode Island", "America/New_York"),
+    "SC": ("South Carolina", "America/New_York"),
+    "SD": ("South Dakota", "America/Chicago"),
+    "TN": ("Tennessee", "America/Chicago"),
+    "TX": ("Texas", "America/Chicago"),
+    "UT": ("Utah", "America/Denver"),
+    "VT": ("Vermont", "America/New_York"),
+    "VA": ("Virginia", "America/New_York"),
+    "WA": ("Washington", "America/Los_Angeles"),
+    "WV": ("West Virginia", "America/New_York"),
+    "WI": ("Wisconsin", "America/Chicago"),
+    "WY": ("Wyoming", "America/Denver"),
+}
+_TIMEZONE_BY_STATE = {}
+_STATE_CODES = {}
+for _code, (_name, _tz) in STATE_TIMEZONES.items():
+    _TIMEZONE_BY_STATE[_code.lower()] = _tz
+    _TIMEZONE_BY_STATE[_name.lower()] = _tz
+    _STATE_CODES[_code.lower()] = _code
+    _STATE_CODES[_name.lower()] = _code
+
+
+def _parse_date(text):
+    text = text.replace(".", "").replace(",", " ")
+    text = SEPT.sub("Sep", " ".join(text.split()))
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_time(text):
+    text = text.replace(".", "").replace(" ", "").upper()
+    for fmt in ("%I:%M%p", "%I%p"):
+        try:
+            return datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_part(text, default_date=None):
+    """ (date, time or None) of one side of a range, or None """
+    text = TRAILING_NOISE.sub("", WEEKDAY_PREFIX.sub("", text.strip()))
+    match = DATE_TIME.match(text)
+    if match:
+        day = _parse_date(match.group("date"))
+        if day is None:
+            return None
+        return day, _parse_time(match.group("time")) if match.group("time") else None
+
+    match = TIME_ONLY.match(text)
+    if match and default_date is not None:
+        return default_date, _parse_time(match.group("time"))
+    return None
+
+
+def _iso(day, at):
+    return datetime.combine(day, at).isoformat() if at else day.isoformat()
+
+
+def parse_event_date_range(text):
+    """
+    (start, end) naive local ISO strings for a Sulekha date string; a bare
+    date ("2025-04-04") means no time was listed. Missing or unparseable
+    values give None.
+    """
+    if not text:
+        return None, None
+
+    parts = RANGE_SEPARATOR.split(text.strip(), maxsplit=1)
+    start = _parse_part(parts[0])
+    if start is None:
+        return None, None
+
+    end = _parse_part(parts[1], default_date=start[0]) if len(parts) > 1 else None
+    return _iso(*start), _iso(*end) if end else None
+
+
+def state_from_location(location):
+    """ "San Jose, CA" -> "CA" """
+    match = STATE_SUFFIX.search((location or "").strip())
+    return match.group(1) if match else None
+
+
+def state_code(state):
+    """ "California" or "ca" -> "CA"; None for anything unrecognised """
+    return _STATE_CODES.get((state or "").strip().lower())
+
+
+def timezone_for_state(*states):
+    """ Timezone of the first recognised state name or code, else TIME_ZONE """
+    for state in states:
+        tz = _TIMEZONE_BY_STATE.get((state or "").strip().lower())
+        if tz:
+            return ZoneInfo(tz)
+    return ZoneInfo(settings.TIME_ZONE)
+
+
+def typed_event_dates(start, end, tz):
+    """
+    Column values for parsed local ISO strings: timezone-aware event_start and
+    event_end plus the typed date and display time. A date without a time
+    starts at midnight; a date-only end (or a lone date) lasts until the end of
+    that day.
+    """
+    values = {"event_start": None, "event_end": None, "date": None, "time": ""}
+    if not start:
+        return values
+
+    start_has_time = "T" in start
+    start_at = datetime.fromisoformat(start) if start_has_time else datetime.combine(date.fromisoformat(start), time.min)
+    values["event_start"] = start_at.replace(tzinfo=tz)
+    values["date"] = start_at.date()
+    if start_has_time:
+        values["time"] = start_at.strftime("%I:%M %p")
+
+    if end:
+        if "T" in end:
+            end_at = datetime.fromisoformat(end)
+            if end_at < start_at:  # "10:00 PM - 01:00 AM" runs past midnight
+                end_at += timedelta(days=1)
+        else:
+            end_at = datetime.combine(date.fromisoformat(end), time.max)
+        values["event_end"] = end_at.replace(tzinfo=tz)
+    elif not start_has_time:
+        values["event_end"] = datetime.combine(start_at.date(), time.max).replace(tzinfo=tz)
+    return values
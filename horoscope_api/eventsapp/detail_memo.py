@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from horoscope_api.metrics import DETAIL_MEMO
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class DetailMemo:
+    """
+    Per-crawl memo of parsed event detail pages keyed by URL, so an event
+    listed on several metros is fetched and parsed once per crawl.
+
+    The first caller for a URL runs the fetch; callers arriving while it is
+    in flight wait on the same future, from threads (get) or coroutines
+    (aget) alike. Only successful results are kept: a failed fetch raises in
+    every waiter and the next caller tries again. At most max_entries results
+    are kept, least recently used first out.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self.stats = {"hits": 0, "misses": 0, "shared": 0, "evictions": 0}
+
+    def _count(self, result):
+        self.stats[result] += 1
+        DETAIL_MEMO.inc(result=result)
+
+    def _claim(self, url):
+        """ (result, None) on a hit, else (future, owner) where owner runs the fetch """
+        with self._lock:
+            if url in self._entries:
+                self._entries.move_to_end(url)
+                self._count("hits")
+                return self._entries[url], None
+            future = self._in_flight.get(url)
+            if future is not None:
+                self._count("shared")
+                return future, False
+            future = self._in_flight[url] = Future()
+            self._count("misses")
+            return future, True
+
+    def _settle(self, url, future, result=None, error=None):
+        with self._lock:
+            self._in_flight.pop(url, None)
+            if error is None:
+                self._entries[url] = result
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._count("evictions")
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def get(self, url, fetch):
+        """ Memoized fetch(url) for threads """
+        future, owner = self._claim(url)
+        if owner is None:
+            return future
+        if not owner:
+            return future.result()
+        try:
+            result = fetch(url)
+        except BaseException as e:
+            self._settle(url, future, error=e)
+            raise
+        self._settle(url, future, result)
+        return result
+
+    async def aget(self, url, fetch):
+        """ Memoized await fetch(url) for coroutines """
+        future, owner = self._claim(url)
+        if owner is None:
+            return future
+        if not owner:
+            # shield: a cancelled waiter must not cancel the shared fetch
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            result = await fetch(url)
+        except BaseException as e:
+            self._settle(url, future, error=e)
+            raise
+        self._settle(url, future, result)
+        return result
+
+    def hit_rate(self):
+        """ Share of lookups answered without a fetch of their own """
+        lookups = self.stats["hits"] + self.stats["shared"] + self.stats["misses"]
+        return (self.stats["hits"] + self.stats["shared"]) / lookups if lookups else 0.0
+
+    def log_stats(self):
+        logger.info(
+            f"Detail memo: {self.stats['misses']} pages fetched, {self.stats['hits']} hits, "
+            f"{self.stats['shared']} shared in flight, {self.stats['evictions']} evictions, "
+            f"hit rate {self.hit_rate():.0%}"
+        )
@@ -0,0 +1,121 @@
+"""
+Geohash and distance helpers for radius search on plain Postgres (no PostGIS).
+
+Events store a numeric latitude/longitude plus a geohash. A radius query
+first narrows candidates to the few geohash cells covering the search circle
+(`geohash LIKE 'prefix%'` on a pattern-ops index) and a latitude/longitude
+bounding box, then computes the exact great-circle distance only for those
+rows.
+"""
+
+import math
+
+from django.db.models import F, FloatField
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+# Cell size in degrees (lat, lon) for each geohash length
+_CELL_SIZES = {
+    length: (180.0 / 2 ** ((length * 5) // 2), 360.0 / 2 ** ((length * 5 + 1) // 2))
+    for length in range(1, GEOHASH_PRECISION + 1)
+}
+MAX_COVER_CELLS = 16
+
+
+def to_float(value):
+    """ Mastercity stores coordinates as text """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if value >= middle:
+            bits = bits * 2 + 1
+            bounds[0] = middle
+        else:
+            bits = bits * 2
+            bounds[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def bounding_box(latitude, longitude, miles):
+    """
+    (min_lat, max_lat, min_lon, max_lon) enclosing the circle. Longitudes are
+    clipped at +/-180 rather than wrapped, so a circle crossing the
+    antimeridian loses the part on the other side; the events are all in the
+    US, where only the western Aleutians come near it.
+    """
+    lat_delta = miles / MILES_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(latitude))
+    lon_delta = 180.0 if cos_lat < 1e-6 else min(180.0, miles / (MILES_PER_DEGREE_LAT * cos_lat))
+    return (
+        max(-90.0, latitude - lat_delta),
+        min(90.0, latitude + lat_delta),
+        max(-180.0, longitude - lon_delta),
+        min(180.0, longitude + lon_delta),
+    )
+
+
+def covering_geohashes(latitude, longitude, miles):
+    """
+    Smallest set of geohash prefixes (at most MAX_COVER_CELLS, longest
+    possible) whose cells cover the bounding box of the circle
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, miles)
+    best = [""]
+    for length in range(1, GEOHASH_PRECISION + 1):
+        cell_lat, cell_lon = _CELL_SIZES[length]
+        rows = math.floor((max_lat - min_lat) / cell_lat) + 2
+        cols = math.floor((max_lon - min_lon) / cell_lon) + 2
+        if rows * cols > MAX_COVER_CELLS * 4:
+            break
+        cells = set()
+        # Step by one cell so every cell the box touches is sampled
+        for i in range(rows):
+            lat = min(max_lat, min_lat + i * cell_lat)
+            for j in range(cols):
+                lon = min(max_lon, min_lon + j * cell_lon)
+                cells.add(encode_geohash(lat, lon, length))
+        if len(cells) > MAX_COVER_CELLS:
+            break
+        best = sorted(cells)
+    return best
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """ Great-circle distance in Python, the reference for distance_miles_expression """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def distance_miles_expression(latitude, longitude, lat_field="latitude", lon_field="longitude"):
+    """ Haversine distance in miles from a point to each row, as an SQL expression """
+    lat1 = math.radians(latitude)
+    lat2 = Radians(F(lat_field))
+    a = Power(Sin((lat2 - lat1) / 2), 2) + math.cos(lat1) * Cos(lat2) * Power(
+        Sin((Radians(F(lon_field)) - math.radians(longitude)) / 2), 2
+    )
+    return 2 * EARTH_RADIUS_MILES * ASin(Sqrt(a, output_field=FloatField()))
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from horoscope_api.metrics import FETCH_BYTES, FETCHES, STAGE_SECONDS, fetch_outcome
+
+logger = logging.getLogger(__name__)
+
+SULEKHA_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Referer": "https://events.sulekha.com/",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    "Cache-Control": "max-age=0",
+}
+
+POOL_SIZE = 10
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+REQUEST_TIMEOUT = 15
+
+
+class HttpClient:
+    """
+    Pooled keep-alive HTTP client shared by the synchronous scrapers.
+    Connections are reused across requests to the same host, failed
+    requests are retried with exponential backoff, and per-host
+    request/connection statistics are collected.
+    """
+
+    def __init__(
+        self,
+        pool_size=POOL_SIZE,
+        max_retries=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        timeout=REQUEST_TIMEOUT,
+        headers=None,
+    ):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(SULEKHA_HEADERS if headers is None else headers)
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            # Hand the last response back so callers keep using raise_for_status()
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+        self._lock = threading.Lock()
+        self._stats = defaultdict(
+            lambda: {"requests": 0, "errors": 0, "bytes": 0, "seconds": 0.0}
+        )
+
+    def get(self, url, **kwargs):
+        """ GET a URL over the pooled session, recording per-host stats """
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except requests.RequestException:
+            self._record(host, started, error=True, outcome="error")
+            raise
+
+        self._record(
+            host,
+            started,
+            error=response.status_code >= 400,
+            size=len(response.content),
+            outcome=fetch_outcome(response.status_code),
+        )
+        return response
+
+    def _record(self, host, started, error=False, size=0, outcome="ok"):
+        FETCHES.inc(source="sulekha", outcome=outcome)
+        FETCH_BYTES.inc(size, source="sulekha")
+        STAGE_SECONDS.observe(time.perf_counter() - started, source="sulekha", stage="fetch")
+        with self._lock:
+            stats = self._stats[host]
+            stats["requests"] += 1
+            stats["errors"] += int(error)
+            stats["bytes"] += size
+            stats["seconds"] += time.perf_counter() - started
+
+    def host_stats(self):
+        """
+        Snapshot of per-host stats; "connections" is the number of TCP/TLS
+        connections the pool had to open, so requests - connections is the
+        number of handshakes saved by keep-alive.
+        """
+        with self._lock:
+            snapshot = {host: dict(stats) for host, stats in self._stats.items()}
+
+        for host, stats in snapshot.items():
+            pools = self.adapter.poolmanager.pools
+            opened = 0
+            for key in pools.keys():
+                if key.key_host == host.split(":")[0]:
+                    opened += pools[key].num_connections
+            stats["connections"] = opened
+        return snapshot
+
+    def log_stats(self):
+        for host, stats in self.host_stats().items():
+            logger.info(
+                f"{host}: {stats['requests']} requests over {stats['connections']} connections, "
+                f"{stats['errors']} errors, {stats['bytes']} bytes in {stats['seconds']:.1f}s"
+            )
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client(**options):
+    """
+    Return the process-wide HttpClient, creating it on first use.
+    Options only apply when the client is created.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(**options)
+        return _client
+
+
+def reset_http_client():
+    """ Close the shared client so the next run starts with fresh stats """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
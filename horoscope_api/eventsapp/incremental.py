@@ -0,0 +1,144 @@
+"""
+Incremental crawls: fetch event detail pages only for new or changed cards.
+
+Before a crawl, the database-writing process loads the listing-card
+signature (date, price, status) of every stored Sulekha event with
+load_known_cards(). The scrapers compare each listing card against it and
+skip the detail page of cards that are already stored unchanged, setting
+their EventRecord.stored_details instead. fill_stored_details()
+(with_stored_details() on a crawl stream) then copies the venue, terms, artist, organizer and ticket
+data back in from the stored row, so the ingested event (and its
+content_hash) is the same as after a full fetch.
+
+The card comparison runs in crawl shard processes, which never set up the
+ORM, so models are only imported by the functions that query them.
+"""
+
+import logging
+
+from django.db.models import Q
+
+from horoscope_api.metrics import DETAIL_PAGES
+
+from .records import DETAIL_FIELDS, DETAILS_ERROR, EventRecord
+from .utils import SULEKHA_BASE_URL, extract_event_details_inside_link, merge_event_details
+
+logger = logging.getLogger(__name__)
+
+# Columns natural_key() reads from a stored row or an EventRecord
+KEY_FIELDS = ("event_id", "event_url", "name", "event_date", "venue")
+
+
+def natural_key(values):
+    """
+    Identity of an event within a city: the Sulekha event id, falling back to
+    its URL, then to title/date/venue for cards without either
+    """
+    if values.get("event_id"):
+        return ("id", values["event_id"])
+    if values.get("event_url") and values["event_url"] != "#":
+        return ("url", values["event_url"])
+    return ("card", values.get("name"), values.get("event_date"), values.get("venue"))
+
+
+def card_key(event):
+    """ natural_key() of a stored row or a scraped EventRecord """
+    return natural_key({name: getattr(event, name) for name in KEY_FIELDS})
+
+
+def card_signature(event):
+    """ Listing-card fields that mark an event as changed """
+    return (event.event_date, event.price, event.status)
+
+
+def _stored_rows():
+    """ Sulekha rows whose details were fetched successfully, newest first """
+    from .models import CommunityEvents
+
+    return (
+        CommunityEvents.objects.filter(event_url__startswith=SULEKHA_BASE_URL)
+        .exclude(description=DETAILS_ERROR)
+        .order_by("-updated_at")
+    )
+
+
+def load_known_cards(city_names=None):
+    """
+    natural_key -> card signature of every stored Sulekha event, or only of
+    those stored for city_names
+    """
+    known = {}
+    rows = _stored_rows().only("event_date", "price", "status", *KEY_FIELDS)
+    if city_names is not None:
+        rows = rows.filter(city__in=list(city_names))
+    for row in rows.iterator(chunk_size=2000):
+        known.setdefault(card_key(row), card_signature(row))
+    logger.info(f"Incremental crawl: {len(known)} stored events")
+    return known
+
+
+def is_known(event, known):
+    """ True when a card is stored with the same date, price and status """
+    return known is not None and known.get(card_key(event)) == card_signature(event)
+
+
+def stored_details(row):
+    """ A stored row's detail columns as the EventRecord parse_event_details() returns """
+    return EventRecord(**{name: getattr(row, name) for name in DETAIL_FIELDS})
+
+
+def fill_stored_details(events, client=None):
+    """
+    Merge stored details into the events a scraper marked with
+    stored_details. An event whose row changed or disappeared since
+    load_known_cards() has its detail page fetched after all. Returns the
+    number of events filled from the database.
+    """
+    pending = [event for event in events if event.stored_details]
+    for event in pending:
+        event.stored_details = False
+    if not pending:
+        return 0
+
+    event_ids = {event.event_id for event in pending if event.event_id}
+    links = {event.event_url for event in pending if not event.event_id}
+    rows = _stored_rows().filter(Q(event_id__in=event_ids) | Q(event_url__in=links))
+    stored = {}
+    for row in rows.only("event_date", "price", "status", *KEY_FIELDS, *DETAIL_FIELDS):
+        stored.setdefault((card_key(row), card_signature(row)), row)
+
+    filled = 0
+    for event in pending:
+        row = stored.get((card_key(event), card_signature(event)))
+        if row is not None:
+            merge_event_details(event, stored_details(row))
+            filled += 1
+        else:
+            merge_event_details(event, extract_event_details_inside_link(event.event_url, client=client))
+            DETAIL_PAGES.inc(result="fetched")
+    return filled
+
+
+def with_stored_details(items, batch_size=200):
+    """
+    Crawl-stream stage (see async_scraper.iter_stream_metros) that fills the
+    stored_details events with one query per `batch_size` of them. Held-back
+    events are released before any metro's "done" item, so they always
+    precede it.
+    """
+    held = []
+    for item in items:
+        kind, _, payload = item
+        stored = kind == "event" and payload.stored_details
+        if stored:
+            held.append(item)
+        if held and (kind == "done" or len(held) >= batch_size):
+            fill_stored_details([event for _, _, event in held])
+            yield from held
+            held = []
+        if not stored:
+            yield item
+
+    if held:
+        fill_stored_details([event for _, _, event in held])
+        yield from held
@@ -0,0 +1,364 @@
+import ast
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from horoscope_api.metrics import METRO_SECONDS, ROWS_WRITTEN, STAGE_SECONDS
+
+from .city_index import get_mastercity_index
+from .dates import state_code, state_from_location, timezone_for_state, typed_event_dates
+from .geo import encode_geohash, to_float
+from .incremental import KEY_FIELDS, natural_key
+from .models import CommunityEvents
+from .records import json_list
+from .utils import SULEKHA_BASE_URL
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# CommunityEvents columns written by the scraper (everything except the
+# bookkeeping timestamps and the primary key)
+EVENT_FIELDS = [
+    "name",
+    "event_id",
+    "event_date",
+    "location",
+    "venue",
+    "price",
+    "status",
+    "category",
+    "performers",
+    "cover_image",
+    "action_type",
+    "event_url",
+    "description",
+    "venue_name",
+    "venue_full_address",
+    "venue_street",
+    "venue_city",
+    "venue_state",
+    "venue_zip",
+    "terms_title",
+    "terms_location",
+    "terms_list",
+    "artist_name",
+    "artist_image",
+    "artist_description",
+    "artist_link",
+    "organizer_name",
+    "organizer_logo",
+    "organizer_events_link",
+    "organizer_upcoming_count",
+    "organizer_follow_available",
+    "ticket_types",
+    "ticket_action_button",
+    "min_ticket_price",
+    "state",
+    "city",
+    "time",
+    "date",
+    "event_start",
+    "event_end",
+    "latitude",
+    "longitude",
+    "geohash",
+]
+
+PRICE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def flatten_events(categorized_events):
+    """
+    Flatten the section -> events mapping returned by the scrapers
+    """
+    all_events = []
+    for category, events in categorized_events.items():
+        if isinstance(events, list):
+            all_events.extend(events)
+    return all_events
+
+
+def normalize_event(event, city_name, state_name):
+    """
+    Map one scraped EventRecord onto CommunityEvents column values, in the
+    form the database stores them (so they can be compared against loaded
+    rows)
+    """
+    values = event.column_values()
+    values["state"] = state_name
+    values["city"] = city_name
+
+    tz = timezone_for_state(event.venue_state, state_from_location(event.location), state_name)
+    values.update(typed_event_dates(event.start_local, event.end_local, tz))
+    values["min_ticket_price"] = min_ticket_price(values["ticket_types"], values["price"])
+    values.update(event_location(values["venue_city"], values["venue_state"], city_name))
+
+    meta = CommunityEvents._meta
+    return {name: meta.get_field(name).to_python(value) for name, value in values.items()}
+
+
+def parse_stored_list(value):
+    """
+    Decode a JSON column value written before the columns were JSON: either
+    JSON text or the Python repr of a list. Returns (list, ok); unreadable
+    values give ([], False).
+    """
+    if value is None or isinstance(value, list):
+        return value, True
+    if not isinstance(value, str) or not value.strip():
+        return None, True
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            parsed = parse(value)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            continue
+        return json_list(parsed), True
+    return [], False
+
+
+def parse_price(text):
+    """ "$1,250.00" -> Decimal("1250.00"); "Free" -> 0; None when there is no price """
+    if not text:
+        return None
+    if "free" in text.lower():
+        return Decimal("0")
+    match = PRICE.search(text)
+    if not match:
+        return None
+    try:
+        return Decimal(match.group().replace(",", "")).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None
+
+
+def min_ticket_price(ticket_types, card_price=None):
+    """ Cheapest listed ticket type, falling back to the card's "Starts at $X" """
+    prices = [parse_price(ticket.get("price")) for ticket in ticket_types or [] if isinstance(ticket, dict)]
+    prices = [price for price in prices if price is not None]
+    if prices:
+        return min(prices)
+    return parse_price(card_price)
+
+
+def event_fingerprint(values):
+    """
+    Stable SHA-256 of a normalized event (see normalize_event), stored in
+    CommunityEvents.content_hash so unchanged events can be skipped
+    """
+    payload = json.dumps(values, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def resolve_state(city_name):
+    return get_mastercity_index().state_for(city_name)
+
+
+def event_location(venue_city, venue_state, city_name):
+    """
+    latitude/longitude/geohash of an event: its venue city when Mastercity
+    knows it in the venue's state, else the city the event is listed under
+    """
+    index = get_mastercity_index()
+    records = []
+    if venue_city:
+        record = index.get(venue_city)
+        if record and (not venue_state or state_code(record["state"]) == state_code(venue_state)):
+            records.append(record)
+    records.append(index.get(city_name))
+
+    for record in records:
+        if record is None:
+            continue
+        latitude, longitude = to_float(record["lat"]), to_float(record["long"])
+        if latitude is not None and longitude is not None:
+            return {"latitude": latitude, "longitude": longitude, "geohash": encode_geohash(latitude, longitude)}
+    return {"latitude": None, "longitude": None, "geohash": None}
+
+
+class CityEventWriter:
+    """
+    Streaming upsert of one city's scraped events. The city's existing rows
+    are read once (ids, keys and content hashes only) when the first event
+    arrives; inserts and updates are written every `batch_size` events, each
+    batch in its own transaction, so memory stays flat however many events
+    stream through. finish() removes the Sulekha rows that were not seen,
+    which only makes sense once the whole listing has been streamed, and is
+    skipped when no event arrived at all (an empty or unparseable listing
+    must not wipe the city). Rows
+    whose content_hash matches are left alone, or only get updated_at bumped
+    with touch_unchanged=True.
+    """
+
+    def __init__(self, city_name, state_name=None, touch_unchanged=False, batch_size=BATCH_SIZE):
+        self.city_name = city_name
+        self.state_name = resolve_state(city_name) if state_name is None else state_name
+        self.touch_unchanged = touch_unchanged
+        self.batch_size = batch_size
+        self.counts = Counter(inserted=0, updated=0, unchanged=0, removed=0)
+        self.existing = None
+        self.stale_ids = []
+        self.seen = set()
+        self.to_create = []
+        self.to_update = []
+        self.unchanged_ids = []
+        self.normalize_seconds = 0.0
+
+    def _load(self):
+        self.existing = {}
+        scraped_rows = CommunityEvents.objects.filter(
+            Q(event_url__startswith=SULEKHA_BASE_URL) | Q(event_url="#"), city=self.city_name
+        )
+        with STAGE_SECONDS.time(source="sulekha", stage="db_read"):
+            for row in scraped_rows.only("id", "content_hash", *KEY_FIELDS).iterator(chunk_size=2000):
+                key = natural_key({name: getattr(row, name) for name in KEY_FIELDS})
+                if key in self.existing:
+                    self.stale_ids.append(row.id)  # duplicate left over from earlier runs
+                else:
+                    self.existing[key] = row
+
+    def add(self, event):
+        if self.existing is None:
+            self._load()
+
+        started = time.perf_counter()
+        values = normalize_event(event, self.city_name, self.state_name)
+        key = natural_key(values)
+        if key in self.seen:
+            self.normalize_seconds += time.perf_counter() - started
+            return
+        self.seen.add(key)
+
+        now = timezone.now()
+        content_hash = event_fingerprint(values)
+        row = self.existing.pop(key, None)
+        if row is None:
+            self.to_create.append(
+                CommunityEvents(created_at=now, updated_at=now, content_hash=content_hash, **values)
+            )
+        elif row.content_hash == content_hash:
+            self.unchanged_ids.append(row.id)
+        else:
+            for name, value in values.items():
+                setattr(row, name, value)
+            row.content_hash = content_hash
+            row.updated_at = now
+            self.to_update.append(row)
+        self.normalize_seconds += time.perf_counter() - started
+
+        if len(self.to_create) + len(self.to_update) + len(self.unchanged_ids) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """ Write the pending inserts and updates """
+        now = timezone.now()
+        with STAGE_SECONDS.time(source="sulekha", stage="db_write"), transaction.atomic():
+            CommunityEvents.objects.bulk_create(self.to_create, batch_size=self.batch_size)
+            CommunityEvents.objects.bulk_update(
+                self.to_update, EVENT_FIELDS + ["content_hash", "updated_at"], batch_size=self.batch_size
+            )
+            if self.touch_unchanged and self.unchanged_ids:
+                CommunityEvents.objects.filter(id__in=self.unchanged_ids).update(updated_at=now)
+
+        self.counts["inserted"] += len(self.to_create)
+        self.counts["updated"] += len(self.to_update)
+        self.counts["unchanged"] += len(self.unchanged_ids)
+        self.to_create = []
+        self.to_update = []
+        self.unchanged_ids = []
+
+    def finish(self, delete_stale=True):
+        """
+        Write what is pending and, unless delete_stale=False, delete the rows
+        the listing no longer has. Returns a Counter of
+        inserted/updated/unchanged/removed rows.
+        """
+        self.flush()
+        STAGE_SECONDS.observe(self.normalize_seconds, source="sulekha", stage="normalize")
+
+        if delete_stale and not self.seen:
+            logger.warning(f"No events scraped for {self.city_name}; keeping its stored events")
+            delete_stale = False
+        if delete_stale:
+            if self.existing is None:
+                self._load()
+            self.stale_ids.extend(row.id for row in self.existing.values())
+            if self.stale_ids:
+                with STAGE_SECONDS.time(source="sulekha", stage="db_write"):
+                    CommunityEvents.objects.filter(id__in=self.stale_ids).delete()
+            self.counts["removed"] += len(self.stale_ids)
+        self.existing = {}
+        self.stale_ids = []
+
+        for outcome, count in self.counts.items():
+            ROWS_WRITTEN.inc(count, outcome=outcome)
+        return self.counts
+
+
+class MetroEventWriter:
+    """
+    Fans one metro's event stream out to a CityEventWriter per city mapped to
+    it. finish(error) skips the deletes of a failed scrape so it never wipes
+    stored rows; what was already written is kept.
+    """
+
+    def __init__(self, metro, city_names, touch_unchanged=False):
+        self.metro = metro
+        self.writers = [
+            CityEventWriter(city_name, touch_unchanged=touch_unchanged) for city_name in city_names
+        ]
+        self.seconds = 0.0
+
+    def add(self, event):
+        started = time.perf_counter()
+        for writer in self.writers:
+            writer.add(event)
+        self.seconds += time.perf_counter() - started
+
+    def finish(self, error=None):
+        started = time.perf_counter()
+        counts = Counter()
+        if error:
+            logger.warning(f"Skipping deletes for {self.metro}: {error}")
+        for writer in self.writers:
+            counts.update(writer.finish(delete_stale=not error))
+        self.seconds += time.perf_counter() - started
+        METRO_SECONDS.observe(self.seconds, metro=self.metro, stage="ingest")
+        logger.info(f"Ingested {self.metro} into {len(self.writers)} cities: {dict(counts)}")
+        return counts
+
+
+def ingest_city_events(city_name, events, state_name=None, touch_unchanged=False):
+    """
+    Upsert one city's scraped events (an iterable, consumed as it is read)
+    with a CityEventWriter. Returns a Counter of
+    inserted/updated/unchanged/removed rows.
+    """
+    writer = CityEventWriter(city_name, state_name, touch_unchanged=touch_unchanged)
+    for event in events:
+        writer.add(event)
+    return writer.finish()
+
+
+def ingest_metro_events(metro, city_names, categorized_events, touch_unchanged=False):
+    """
+    Write one scraped metro to every city mapped to it inside a single
+    transaction. Failed scrapes are skipped so they never wipe stored rows.
+    """
+    if "error" in categorized_events:
+        logger.warning(f"Skipping ingestion for {metro}: {categorized_events['error']}")
+        return Counter()
+
+    writer = MetroEventWriter(metro, city_names, touch_unchanged=touch_unchanged)
+    with transaction.atomic():
+        for event in flatten_events(categorized_events):
+            writer.add(event)
+        return writer.finish()
@@ -0,0 +1,198 @@
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .crawl import build_crawl_plan, run_crawl
+from .models import CrawlJob
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (CrawlJob.STATUS_QUEUED, CrawlJob.STATUS_RUNNING)
+
+DEFAULT_HEARTBEAT = 30
+DEFAULT_STALE_AFTER = 10 * 60
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def fail_stale_jobs(stale_after=None):
+    """
+    Mark running jobs failed when their worker stopped sending heartbeats
+    (killed, OOM, deploy), so they no longer block new crawls. Returns the
+    number of jobs failed.
+    """
+    if stale_after is None:
+        stale_after = getattr(settings, "EVENTS_CRAWL_JOB_STALE_AFTER", DEFAULT_STALE_AFTER)
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=stale_after)
+    failed = CrawlJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=CrawlJob.STATUS_RUNNING,
+    ).update(
+        status=CrawlJob.STATUS_FAILED,
+        error=f"Worker sent no heartbeat for {stale_after} seconds",
+        finished_at=now,
+    )
+    if failed:
+        logger.warning(f"Failed {failed} crawl jobs whose worker stopped sending heartbeats")
+    return failed
+
+
+def enqueue_crawl():
+    """
+    Queue a crawl and return its job. If a crawl is already queued or
+    running, that job is returned instead of stacking up another one.
+    """
+    fail_stale_jobs()
+    try:
+        with transaction.atomic():
+            active = (
+                CrawlJob.objects.select_for_update()
+                .filter(status__in=ACTIVE_STATUSES)
+                .order_by("id")
+                .first()
+            )
+            if active:
+                return active, False
+            return CrawlJob.objects.create(), True
+    except IntegrityError:
+        # A concurrent enqueue created the job first; crawl_jobs_one_active_idx
+        # only allows one queued job
+        return CrawlJob.objects.filter(status__in=ACTIVE_STATUSES).order_by("id").first(), False
+
+
+def claim_next_job(worker=None):
+    """
+    Atomically move the oldest queued job to running. SKIP LOCKED lets
+    several workers poll the same table without claiming the same job.
+    """
+    fail_stale_jobs()
+    try:
+        return _claim_next_job(worker)
+    except IntegrityError:
+        # Another job is still running (crawl_jobs_one_active_idx)
+        return None
+
+
+def _claim_next_job(worker):
+    with transaction.atomic():
+        job = (
+            CrawlJob.objects.select_for_update(skip_locked=True)
+            .filter(status=CrawlJob.STATUS_QUEUED)
+            .order_by("id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = CrawlJob.STATUS_RUNNING
+        job.worker = worker or worker_name()
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=["status", "worker", "started_at", "heartbeat_at"])
+        return job
+
+
+class JobHeartbeat:
+    """
+    Bumps a running job's heartbeat_at every `interval` seconds from a
+    background thread, for as long as the with block runs
+    """
+
+    def __init__(self, job, interval=None):
+        self.job = job
+        if interval is None:
+            interval = getattr(settings, "EVENTS_CRAWL_JOB_HEARTBEAT", DEFAULT_HEARTBEAT)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    CrawlJob.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now())
+                except Exception:
+                    logger.exception(f"Could not record the heartbeat of crawl job {self.job.pk}")
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name=f"crawl-job-{self.job.pk}-heartbeat", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_job(job, crawl_plan=None, processes=None, incremental=None):
+    """
+    Run a claimed crawl job, recording per-metro progress on the job row.
+    processes and incremental default to the EVENTS_CRAWL_PROCESSES and
+    EVENTS_CRAWL_INCREMENTAL settings.
+    """
+    if processes is None:
+        processes = getattr(settings, "EVENTS_CRAWL_PROCESSES", 1)
+    if incremental is None:
+        incremental = getattr(settings, "EVENTS_CRAWL_INCREMENTAL", False)
+    if crawl_plan is None:
+        crawl_plan = build_crawl_plan()
+
+    job.metros_total = len(crawl_plan)
+    job.progress = {metro: {"status": "pending", "cities": len(cities)} for metro, cities in crawl_plan.items()}
+    job.save(update_fields=["metros_total", "progress"])
+
+    def on_metro_done(metro, city_names, counts, error):
+        job.progress[metro] = {
+            "status": "failed" if error else "done",
+            "cities": len(city_names),
+            **counts,
+        }
+        if error:
+            job.progress[metro]["error"] = error
+        job.metros_done += 1
+        job.heartbeat_at = timezone.now()
+        job.save(update_fields=["progress", "metros_done", "heartbeat_at"])
+
+    try:
+        with JobHeartbeat(job):
+            totals = run_crawl(
+                crawl_plan, on_metro_done=on_metro_done, processes=processes, incremental=incremental
+            )
+    except Exception as e:
+        logger.exception(f"Crawl job {job.pk} failed")
+        job.status = CrawlJob.STATUS_FAILED
+        job.error = str(e)
+    else:
+        job.status = CrawlJob.STATUS_SUCCEEDED
+        job.counts = dict(totals)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "counts", "finished_at"])
+    return job
+
+
+def job_status(job):
+    """ JSON-serializable status of a job for the status endpoint """
+    return {
+        "job_id": job.pk,
+        "status": job.status,
+        "metros_total": job.metros_total,
+        "metros_done": job.metros_done,
+        "progress": job.progress,
+        "counts": job.counts,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
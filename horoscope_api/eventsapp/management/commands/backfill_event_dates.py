@@ -0,0 +1,56 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from eventsapp.dates import parse_event_date_range, state_from_location, timezone_for_state, typed_event_dates
+from eventsapp.models import CommunityEvents
+
+DATE_COLUMNS = ["event_start", "event_end", "date", "time"]
+
+
+class Command(BaseCommand):
+    help = "Parse event_date text of existing rows into event_start/event_end/date/time"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows read and updated per batch")
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-parse every row, not just rows without event_start",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        queryset = CommunityEvents.objects.exclude(event_date__isnull=True).exclude(event_date="")
+        if not options["all"]:
+            queryset = queryset.filter(event_start__isnull=True)
+        queryset = queryset.only("id", "event_date", "location", "state", "venue_state", *DATE_COLUMNS).order_by("id")
+
+        counts = Counter()
+        last_id = 0
+        while True:
+            # Keyset batches: rows updated in one batch drop out of the
+            # event_start IS NULL filter, so OFFSET would skip rows
+            rows = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            changed = []
+            for row in rows:
+                start, end = parse_event_date_range(row.event_date)
+                if start is None:
+                    counts["unparsed"] += 1
+                    continue
+                tz = timezone_for_state(row.venue_state, state_from_location(row.location), row.state)
+                for column, value in typed_event_dates(start, end, tz).items():
+                    setattr(row, column, value)
+                changed.append(row)
+
+            with transaction.atomic():
+                CommunityEvents.objects.bulk_update(changed, DATE_COLUMNS)
+            counts["updated"] += len(changed)
+            self.stdout.write(f"Up to id {last_id}: {dict(counts)}")
+
+        self.stdout.write(f"Done: {counts['updated']} rows updated, {counts['unparsed']} unparseable dates left as is")
@@ -0,0 +1,53 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from eventsapp.ingest import event_location
+from eventsapp.models import CommunityEvents
+
+GEO_COLUMNS = ["latitude", "longitude", "geohash"]
+
+
+class Command(BaseCommand):
+    help = "Fill latitude/longitude/geohash of existing rows from Mastercity"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows read and updated per batch")
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute every row, not just rows without coordinates",
+        )
+
+    def handle(self, *args, **options):
+        queryset = CommunityEvents.objects.all()
+        if not options["all"]:
+            queryset = queryset.filter(geohash__isnull=True)
+        queryset = queryset.only("id", "city", "venue_city", "venue_state", *GEO_COLUMNS).order_by("id")
+
+        counts = Counter()
+        last_id = 0
+        while True:
+            # Keyset batches: updated rows drop out of the geohash IS NULL filter
+            rows = list(queryset.filter(id__gt=last_id)[:options["batch_size"]])
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            changed = []
+            for row in rows:
+                location = event_location(row.venue_city, row.venue_state, row.city)
+                if location["geohash"] is None:
+                    counts["unknown city"] += 1
+                    continue
+                for column, value in location.items():
+                    setattr(row, column, value)
+                changed.append(row)
+
+            with transaction.atomic():
+                CommunityEvents.objects.bulk_update(changed, GEO_COLUMNS)
+            counts["updated"] += len(changed)
+            self.stdout.write(f"Up to id {last_id}: {dict(counts)}")
+
+        self.stdout.write(f"Done: {counts['updated']} rows updated, {counts['unknown city']} without a known city")
@@ -0,0 +1,63 @@
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from eventsapp.utils import parse_event_details, parse_sulekha_listing
+from horoscope.utils import parse_horoscope_details, parse_horoscope_links
+
+BACKENDS = ("html.parser", "lxml")
+
+
+def corpus_pages():
+    """ (name, parse function, html) for every saved page of both apps """
+    sulekha = Path(apps.get_app_config("eventsapp").path) / "testdata" / "sulekha"
+    for path in sorted(sulekha.glob("*.html")):
+        if path.name.startswith("listing"):
+            parse = lambda html: parse_sulekha_listing(html, "bay-area", fetch_details=False)
+        else:
+            parse = parse_event_details
+        yield f"sulekha/{path.name}", parse, path.read_text(encoding="utf-8")
+
+    astroved = Path(apps.get_app_config("horoscope").path) / "testdata" / "astroved"
+    for path in sorted(astroved.glob("*.html")):
+        if path.name == "index.html":
+            parse = parse_horoscope_links
+        else:
+            parse = lambda html, sign=path.stem.capitalize(): parse_horoscope_details(html, sign)
+        yield f"astroved/{path.name}", parse, path.read_text(encoding="utf-8")
+
+
+class Command(BaseCommand):
+    help = "Time every saved test page with each BeautifulSoup backend and report the speedup"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200, help="Parses per page and backend")
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        self.stdout.write(f"{'page':<34}{'html.parser ms':>16}{'lxml ms':>10}{'speedup':>9}")
+
+        totals = dict.fromkeys(BACKENDS, 0.0)
+        for name, parse, html in corpus_pages():
+            timings = {}
+            for backend in BACKENDS:
+                with override_settings(HTML_PARSER=backend):
+                    parse(html)  # warm up selector and builder caches
+                    started = time.perf_counter()
+                    for _ in range(repeat):
+                        parse(html)
+                    timings[backend] = (time.perf_counter() - started) / repeat * 1000
+                totals[backend] += timings[backend]
+
+            self.stdout.write(
+                f"{name:<34}{timings['html.parser']:>16.3f}{timings['lxml']:>10.3f}"
+                f"{timings['html.parser'] / timings['lxml']:>8.2f}x"
+            )
+
+        self.stdout.write(
+            f"{'total':<34}{totals['html.parser']:>16.3f}{totals['lxml']:>10.3f}"
+            f"{totals['html.parser'] / totals['lxml']:>8.2f}x"
+        )
@@ -0,0 +1,366 @@
+import copy
+import dataclasses
+import json
+import platform
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from eventsapp import async_scraper, ingest
+from eventsapp import utils as sulekha_utils
+from eventsapp.http_client import HttpClient
+from eventsapp.ingest import flatten_events, ingest_city_events
+from eventsapp.models import CommunityEvents, Mastercity
+from eventsapp.sharding import scrape_metros_sharded
+from horoscope import utils as horoscope_utils
+from horoscope.session import run_sync
+from horoscope_api.metrics import REGISTRY, STAGE_SECONDS
+from horoscope_api.parsing import make_soup, select, select_one
+
+DETAIL_PATH = re.compile(r"^/detail/(\d+)$")
+SIGN_PATH = re.compile(r"^/horoscopes/daily-horoscope/([a-z]+)$")
+
+# The async scraper's token bucket is left effectively unlimited for replays
+UNLIMITED_RATE = 1_000_000
+
+
+def build_listing(html, cards, first_id=10000):
+    """
+    The saved listing page with its event cards repeated `cards` times, each
+    copy with its own event id (from first_id on) and detail link on the
+    fixture server
+    """
+    soup = make_soup(html)
+    section = select_one(soup, "section.global-eventwarp")
+    articles = select(section, "article.global-eventlist")
+    templates = [article for article in articles if article.get("id", "").startswith("event-")]
+    for article in articles:
+        article.extract()
+
+    for i in range(cards):
+        event_id = first_id + i
+        article = copy.copy(templates[i % len(templates)])
+        article["id"] = f"event-{event_id}"
+        for link in article.find_all("a", href=True):
+            if "/detail/" in link["href"]:
+                link["href"] = f"/detail/{event_id}"
+        section.append(article)
+    return str(soup)
+
+
+class FixtureSite:
+    """
+    Serves the saved Sulekha and astroved test pages from a local HTTP
+    server. Every metro gets its own copy of the listing with distinct event
+    ids (see build_listing), so the per-crawl detail memo does not hide the
+    fetches; detail pages and sign pages cycle through the saved ones.
+    """
+
+    def __init__(self, cards):
+        sulekha = Path(apps.get_app_config("eventsapp").path) / "testdata" / "sulekha"
+        astroved = Path(apps.get_app_config("horoscope").path) / "testdata" / "astroved"
+        self.cards = cards
+        self.listing_html = (sulekha / "listing_bay_area.html").read_text(encoding="utf-8")
+        self.listings = {}
+        self._lock = threading.Lock()
+        self.details = [path.read_text(encoding="utf-8") for path in sorted(sulekha.glob("detail_*.html"))]
+        self.horoscope_index = (astroved / "index.html").read_text(encoding="utf-8")
+        self.sign_page = (astroved / "aries.html").read_text(encoding="utf-8")
+        self.server = None
+
+    def page(self, path):
+        match = DETAIL_PATH.match(path)
+        if match:
+            return self.details[int(match.group(1)) % len(self.details)]
+        if SIGN_PATH.match(path):
+            return self.sign_page
+        if path == "/horoscope/":
+            return self.horoscope_index
+        if re.match(r"^/[a-z0-9-]+$", path):
+            with self._lock:
+                if path not in self.listings:
+                    first_id = 10000 * (len(self.listings) + 1)
+                    self.listings[path] = build_listing(self.listing_html, self.cards, first_id)
+                return self.listings[path]
+        return None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real hosts
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def do_GET(self):
+                body = site.page(self.path.split("?")[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="benchmark-fixtures", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@contextmanager
+def replay(base_url):
+    """ Point both scrapers at the fixture server, without delays or the page cache """
+    with ExitStack() as stack:
+        for module in (sulekha_utils, async_scraper, ingest):
+            stack.enter_context(mock.patch.object(module, "SULEKHA_BASE_URL", base_url))
+        stack.enter_context(mock.patch.object(horoscope_utils, "BASE_URL", base_url))
+        stack.enter_context(mock.patch.object(sulekha_utils, "POLITENESS_DELAY", (0, 0)))
+        stack.enter_context(override_settings(SULEKHA_PAGE_CACHE_DIR=""))
+        yield
+
+
+def stage_stats():
+    """ Time per scraper stage (parse_*, extract_*, fetch, db_*) since the last REGISTRY.clear() """
+    stats = {}
+    for (source, stage), state in sorted(STAGE_SECONDS.snapshot()):
+        count = state["count"]
+        stats[f"{source}.{stage}"] = {
+            "count": count,
+            "total_ms": round(state["sum"] * 1000, 3),
+            "mean_ms": round(state["sum"] * 1000 / count, 3) if count else 0.0,
+        }
+    return stats
+
+
+def measure(run, repeat, memory=True):
+    """
+    Time `repeat` calls of run() (which returns the number of pages it
+    fetched) after one warm-up call. The memory peak comes from one more,
+    separate call under tracemalloc, which would otherwise skew the timings.
+    """
+    run()
+    REGISTRY.clear()
+    started = time.perf_counter()
+    pages = sum(run() for _ in range(repeat))
+    seconds = time.perf_counter() - started
+    result = {
+        "pages": pages,
+        "seconds": round(seconds, 4),
+        "pages_per_second": round(pages / seconds, 2) if seconds else None,
+        "stages": stage_stats(),
+    }
+
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def listing_pages(results):
+    """ Listing plus detail pages behind a metro -> events mapping """
+    return sum(1 + len(flatten_events(events)) for events in results.values())
+
+
+def ensure_sqlite_tables():
+    """ The events tables are unmanaged; create them in a throwaway SQLite database """
+    if connection.vendor != "sqlite":
+        return
+    existing = set(connection.introspection.table_names())
+    with connection.schema_editor() as editor:
+        for model in (CommunityEvents, Mastercity):
+            if model._meta.db_table not in existing:
+                editor.create_model(model)
+
+
+def write_passes(events, cities, traced=False):
+    """
+    Run the insert, unchanged re-ingest and update passes in one transaction
+    that is rolled back afterwards. Yields (pass, counts, seconds, peak
+    traced memory or None) per pass.
+    """
+    changed = [dataclasses.replace(event, price=f"Starts at ${i % 90 + 10}") for i, event in enumerate(events)]
+    with transaction.atomic():
+        for name, batch in (("insert", events), ("unchanged", events), ("update", changed)):
+            REGISTRY.clear()
+            if traced:
+                tracemalloc.start()
+            try:
+                started = time.perf_counter()
+                counts = Counter()
+                for city in cities:
+                    counts.update(ingest_city_events(city, batch, state_name="California"))
+                seconds = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1] if traced else None
+            finally:
+                if traced:
+                    tracemalloc.stop()
+            yield name, counts, seconds, peak
+        transaction.set_rollback(True)
+
+
+def measure_writes(events, cities, memory=True):
+    """ rows/s of ingest_city_events per pass, plus memory peaks from a separate traced run """
+    passes = {}
+    for name, counts, seconds, _ in write_passes(events, cities):
+        rows = counts["inserted"] + counts["updated"] + counts["unchanged"]
+        passes[name] = {
+            "rows": rows,
+            "counts": dict(counts),
+            "seconds": round(seconds, 4),
+            "rows_per_second": round(rows / seconds, 2) if seconds else None,
+            "stages": stage_stats(),
+        }
+
+    if memory:
+        for name, _, _, peak in write_passes(events, cities, traced=True):
+            passes[name]["peak_memory_bytes"] = peak
+    return passes
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the saved Sulekha and astroved pages from a local fixture server and record "
+        "pages/s, per-extractor parse time, memory peaks and database rows/s as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--metros", type=int, default=4, help="Metro listings per scrape")
+        parser.add_argument("--cards", type=int, default=50, help="Event cards per listing")
+        parser.add_argument("--cities", type=int, default=4, help="Cities each scraped event is written to")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scrape phase")
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=2,
+            help="Crawler processes of the sharded phase (1 skips it)",
+        )
+        parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc runs")
+        parser.add_argument("--skip-db", action="store_true", help="Only benchmark scraping and parsing")
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Results file (default: benchmark-results/pipeline-<timestamp>.json)",
+        )
+
+    def handle(self, *args, **options):
+        memory = not options["no_memory"]
+        repeat = options["repeat"]
+        metros = [f"benchmark-metro-{i}" for i in range(1, options["metros"] + 1)]
+        cities = [f"Benchmark City {i}" for i in range(1, options["cities"] + 1)]
+        started_at = datetime.now(timezone.utc)
+
+        site = FixtureSite(options["cards"]).start()
+        scraped = {}
+        try:
+            with replay(site.base_url):
+                client = HttpClient()
+
+                def sulekha_sync():
+                    scraped.update({metro: sulekha_utils.scrape_sulekha_events(metro, client) for metro in metros})
+                    return listing_pages(scraped)
+
+                def sulekha_async():
+                    return listing_pages(
+                        async_scraper.scrape_metros(metros, rate=UNLIMITED_RATE, burst=UNLIMITED_RATE)
+                    )
+
+                def sulekha_sharded():
+                    items = scrape_metros_sharded(
+                        metros,
+                        processes=options["processes"],
+                        rate=UNLIMITED_RATE,
+                        burst=UNLIMITED_RATE,
+                        base_url=site.base_url,
+                        cache_dir="",
+                    )
+                    # One detail page per event item, one listing per metro's "done" item
+                    return sum(1 for _ in items)
+
+                def astroved():
+                    results = run_sync(horoscope_utils.scrape_horoscope())
+                    return 1 + len(results) if isinstance(results, list) else 0
+
+                phases = {}
+                runs = [("sulekha_sync", sulekha_sync), ("sulekha_async", sulekha_async)]
+                if options["processes"] > 1:
+                    runs.append(("sulekha_sharded", sulekha_sharded))
+                runs.append(("astroved", astroved))
+                for name, run in runs:
+                    self.stderr.write(f"Benchmarking {name}...")
+                    phases[name] = measure(run, repeat, memory=memory)
+                client.close()
+
+                writes = None
+                if not options["skip_db"]:
+                    self.stderr.write(f"Benchmarking database writes ({connection.vendor})...")
+                    ensure_sqlite_tables()
+                    writes = measure_writes(flatten_events(scraped[metros[0]]), cities, memory=memory)
+        finally:
+            site.stop()
+
+        results = {
+            "benchmark": "pipeline",
+            "started_at": started_at.isoformat(),
+            "python": platform.python_version(),
+            "html_parser": settings.HTML_PARSER,
+            "database": connection.vendor,
+            "options": {
+                "metros": len(metros),
+                "cards": options["cards"],
+                "cities": len(cities),
+                "repeat": repeat,
+                "processes": options["processes"],
+            },
+            "phases": phases,
+            "database_writes": writes,
+        }
+
+        output = Path(
+            options["output"] or Path("benchmark-results") / f"pipeline-{started_at:%Y%m%dT%H%M%SZ}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+        self.stdout.write(f"{'phase':<16}{'pages':>8}{'pages/s':>10}{'peak MiB':>10}")
+        for name, phase in phases.items():
+            self.stdout.write(
+                f"{name:<16}{phase['pages']:>8}{phase['pages_per_second'] or 0:>10.1f}"
+                f"{phase.get('peak_memory_bytes', 0) / 2 ** 20:>10.1f}"
+            )
+        for name, write in (writes or {}).items():
+            self.stdout.write(
+                f"{'db_' + name:<16}{write['rows']:>8}{write['rows_per_second'] or 0:>10.1f}"
+                f"{(write.get('peak_memory_bytes') or 0) / 2 ** 20:>10.1f}  rows"
+            )
+        self.stdout.write(f"Results written to {output}")
@@ -0,0 +1,65 @@
+import json
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from eventsapp.ingest import min_ticket_price, parse_stored_list
+from eventsapp.models import CommunityEvents
+from eventsapp.records import JSON_LIST_FIELDS
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite performers/terms_list/ticket_types from Python repr to JSON text and fill "
+        "min_ticket_price; run before eventsapp/sql/0006_community_events_jsonb.sql"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows read and updated per batch")
+
+    def handle(self, *args, **options):
+        # Raw SQL throughout: the model already declares JSONFields, which
+        # cannot load repr strings
+        table = CommunityEvents._meta.db_table
+        columns = ", ".join(JSON_LIST_FIELDS)
+        select_sql = f"SELECT id, {columns}, price FROM {table} WHERE id > %s ORDER BY id LIMIT %s"
+        update_sql = (
+            f"UPDATE {table} SET "
+            + ", ".join(f"{name} = %s" for name in JSON_LIST_FIELDS)
+            + ", min_ticket_price = %s WHERE id = %s"
+        )
+
+        counts = Counter()
+        last_id = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(select_sql, [last_id, options["batch_size"]])
+                rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            updates = []
+            for row_id, *stored, price in rows:
+                values = []
+                for name, value in zip(JSON_LIST_FIELDS, stored):
+                    if isinstance(value, str) or value is None:
+                        parsed, ok = parse_stored_list(value)
+                    else:  # column is already jsonb and decoded by the driver
+                        parsed, ok = value, True
+                    if not ok:
+                        counts[f"unreadable {name}"] += 1
+                    values.append(parsed)
+                ticket_types = values[JSON_LIST_FIELDS.index("ticket_types")]
+                updates.append(
+                    [None if value is None else json.dumps(value) for value in values]
+                    + [min_ticket_price(ticket_types, price), row_id]
+                )
+
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(update_sql, updates)
+            counts["rows"] += len(updates)
+            self.stdout.write(f"Up to id {last_id}: {dict(counts)}")
+
+        self.stdout.write(f"Done: {dict(counts)}")
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from eventsapp.jobs import claim_next_job, enqueue_crawl, job_status, run_job
+
+
+class Command(BaseCommand):
+    help = "Run the Sulekha events crawl now, or queue it for crawl_worker with --enqueue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Shard metros across this many crawler processes (default: EVENTS_CRAWL_PROCESSES)",
+        )
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Only queue the crawl and print its job id",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Fetch every event detail page, even when EVENTS_CRAWL_INCREMENTAL is on",
+        )
+
+    def handle(self, *args, **options):
+        job, created = enqueue_crawl()
+        if options["enqueue"]:
+            state = "Queued" if created else "Already active:"
+            self.stdout.write(f"{state} job {job.pk} ({job.status})")
+            return
+
+        job = claim_next_job()
+        if job is None:
+            self.stderr.write("Another worker already picked up the crawl")
+            return
+
+        run_job(job, processes=options["processes"], incremental=False if options["full"] else None)
+        status = job_status(job)
+        self.stdout.write(
+            f"Job {job.pk} {status['status']}: {status['metros_done']}/{status['metros_total']} metros, {status['counts']}"
+        )
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from eventsapp.jobs import claim_next_job, run_job, worker_name
+from horoscope_api.metrics import start_metrics_server
+
+
+class Command(BaseCommand):
+    help = "Process queued events crawl jobs from the crawl_jobs table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Shard metros across this many crawler processes (default: EVENTS_CRAWL_PROCESSES)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between polls when the queue is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit after the queue is empty instead of polling forever",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=None,
+            help="Serve this worker's crawl metrics on http://127.0.0.1:<port>/metrics",
+        )
+
+    def handle(self, *args, **options):
+        name = worker_name()
+        self.stdout.write(f"Crawl worker {name} started")
+        if options["metrics_port"]:
+            start_metrics_server(options["metrics_port"])
+            self.stdout.write(f"Serving metrics on http://127.0.0.1:{options['metrics_port']}/metrics")
+
+        while True:
+            job = claim_next_job(name)
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Running job {job.pk}")
+            run_job(job, processes=options["processes"])
+            self.stdout.write(f"Job {job.pk} {job.status} ({job.metros_done}/{job.metros_total} metros)")
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 # Create your models here.
 class CommunityEvents(models.Model):
     name = models.CharField(max_length=255)
@@ -13,7 +15,7 @@ class CommunityEvents(models.Model):
     cover_image = models.TextField(blank=True, null=True)
     price = models.TextField(blank=True, null=True)
     venue = models.TextField(blank=True, null=True)
-    performers = models.TextField(blank=True, null=True)
+    performers = models.JSONField(blank=True, null=True)  # list of names
     link = models.TextField(blank=True, null=True)
     event_date = models.TextField(blank=True, null=True)
 
@@ -34,7 +36,7 @@ class CommunityEvents(models.Model):
     # Terms & Conditions
     terms_title = models.TextField(blank=True, null=True)
     terms_location = models.TextField(blank=True, null=True)
-    terms_list = models.TextField(blank=True, null=True)  # Store JSON or newline-separated terms
+    terms_list = models.JSONField(blank=True, null=True)  # list of terms
 
     # Artist Details
     artist_name = models.TextField(blank=True, null=True)
@@ -50,13 +52,42 @@ class CommunityEvents(models.Model):
     organizer_follow_available = models.BooleanField(default=False)
 
     # Ticket Information
-    ticket_types = models.TextField(blank=True, null=True)  # Store JSON array as string
+    ticket_types = models.JSONField(blank=True, null=True)  # list of ticket type objects
     ticket_action_button = models.TextField(blank=True, null=True)
+    # Cheapest ticket_types price, else the card's "Starts at" price
+    min_ticket_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
 
+    # Typed start/end parsed from event_date (eventsapp.dates), timezone-aware
+    event_start = models.DateTimeField(blank=True, null=True)
+    event_end = models.DateTimeField(blank=True, null=True)
+
+    # Venue (or listing city) coordinates from Mastercity, see eventsapp.geo
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, null=True)
+
+    # SHA-256 of the normalized scraped payload, used to skip unchanged rows
+    content_hash = models.CharField(max_length=64, blank=True, null=True)
 
     class Meta:
         managed = False
         db_table = 'community_events'
+        # Mirrors eventsapp/sql/0003_community_events_read_indexes.sql; the
+        # read API filters case-insensitively (UPPER(col) = UPPER(value))
+        indexes = [
+            models.Index(Upper("city"), name="community_events_city_idx"),
+            models.Index(Upper("state"), name="community_events_state_idx"),
+            models.Index(Upper("category"), name="community_events_category_idx"),
+            models.Index(Upper("status"), name="community_events_status_idx"),
+            # Mirrors eventsapp/sql/0004_community_events_start_end.sql
+            models.Index(fields=["event_start"], name="community_events_start_idx"),
+            models.Index(fields=["event_end"], name="community_events_end_idx"),
+            # Mirrors eventsapp/sql/0005_community_events_min_ticket_price.sql
+            models.Index(fields=["min_ticket_price"], name="community_events_min_price_idx"),
+            # Mirrors eventsapp/sql/0007_community_events_geo.sql
+            models.Index(fields=["geohash"], name="community_events_geohash_idx", opclasses=["varchar_pattern_ops"]),
+            models.Index(fields=["latitude", "longitude"], name="community_events_lat_lon_idx"),
+        ]
 
 
 class Mastercity(models.Model):
@@ -77,3 +108,46 @@ class Mastercity(models.Model):
         managed = False
         db_table = 'mastercity'
 
+
+
+class CrawlJob(models.Model):
+    """
+    A queued run of the Sulekha events crawl, picked up by the crawl_worker
+    management command. progress maps each metro slug to its outcome.
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    metros_total = models.IntegerField(default=0)
+    metros_done = models.IntegerField(default=0)
+    progress = models.JSONField(default=dict, blank=True)
+    counts = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, null=True)
+    worker = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    # Bumped while a worker runs the job; see jobs.fail_stale_jobs
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = 'crawl_jobs'
+        # Mirrors eventsapp/sql/0002_crawl_jobs.sql
+        constraints = [
+            models.UniqueConstraint(
+                fields=["status"],
+                condition=models.Q(status__in=["queued", "running"]),
+                name="crawl_jobs_one_active_idx",
+            ),
+        ]
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from horoscope_api.metrics import PAGE_CACHE
+
+from .records import decode_record, encode_record
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 6 * 60 * 60
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Bumped whenever the shape of the stored parse changes; entries written with
+# another version are treated as misses (2: events stored as EventRecords)
+ENTRY_VERSION = 2
+
+
+class PageCache:
+    """
+    On-disk HTTP cache for scraped pages.
+
+    Each entry keeps the response body, its ETag/Last-Modified validators and
+    the parsed result. Entries younger than the TTL are served without a
+    request; older ones are revalidated with a conditional GET and, on a 304,
+    the stored parse is reused. The directory is kept under max_bytes by
+    evicting the least recently used entries (tracked through file mtimes).
+    """
+
+    def __init__(self, directory, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = str(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._size = sum(size for _, _, size in self._scan())
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "evicted": 0}
+
+    def count(self, result):
+        """ Bump a stats counter and its scraper_page_cache_total metric """
+        self.stats[result] += 1
+        PAGE_CACHE.inc(result=result)
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def _scan(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                yield entry.path, stat.st_mtime, stat.st_size
+
+    def lookup(self, url):
+        """
+        Return (entry, is_fresh) for a URL, or (None, False) when it is not cached
+        """
+        path = self._path(url)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f, object_hook=decode_record)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            return None, False
+
+        if entry.get("url") != url or entry.get("version") != ENTRY_VERSION:
+            return None, False
+        return entry, time.time() - entry.get("stored_at", 0) < self.ttl
+
+    def conditional_headers(self, entry):
+        """ Validators to send when revalidating a stale entry """
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, body, response_headers, parsed):
+        """ Save a 200 response together with its parsed result """
+        entry = {
+            "url": url,
+            "version": ENTRY_VERSION,
+            "stored_at": time.time(),
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "body": body,
+            "parsed": parsed,
+        }
+        self._write(url, entry)
+
+    def revalidated(self, url, entry, response_headers):
+        """ Restart the TTL of an entry after a 304 Not Modified """
+        entry["stored_at"] = time.time()
+        entry["etag"] = response_headers.get("ETag") or entry.get("etag")
+        entry["last_modified"] = response_headers.get("Last-Modified") or entry.get("last_modified")
+        self._write(url, entry)
+
+    def _write(self, url, entry):
+        path = self._path(url)
+        data = json.dumps(entry, default=encode_record).encode("utf-8")
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write page cache entry for {url}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """ Drop least recently used entries until the cache is at 90% of its budget """
+        entries = sorted(self._scan(), key=lambda item: item[1])
+        self._size = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+        for path, _, size in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            self.count("evicted")
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in list(self._scan()):
+                os.remove(path)
+            self._size = 0
+
+
+def fetch_parsed(cache, client, url, parse):
+    """
+    GET a page through the cache and return parse(body).
+
+    The parsed value is returned from the cache when the entry is fresh or the
+    server answers 304, so unchanged pages are neither downloaded nor parsed.
+    Raises the client's exceptions (including raise_for_status) like a plain GET.
+    """
+    if cache is None:
+        response = client.get(url)
+        response.raise_for_status()
+        return parse(response.text)
+
+    entry, fresh = cache.lookup(url)
+    if entry is not None and fresh:
+        cache.count("hits")
+        return entry["parsed"]
+
+    response = client.get(url, headers=cache.conditional_headers(entry))
+    if entry is not None and response.status_code == 304:
+        cache.count("revalidated")
+        cache.revalidated(url, entry, response.headers)
+        return entry["parsed"]
+
+    response.raise_for_status()
+    cache.count("misses")
+    parsed = parse(response.text)
+    cache.store(url, response.text, response.headers, parsed)
+    return parsed
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache(directory=None):
+    """
+    Return the page cache in `directory` (default: the SULEKHA_PAGE_CACHE_DIR
+    setting), or None when caching is disabled (empty directory)
+    """
+    global _cache
+    if directory is None:
+        directory = getattr(settings, "SULEKHA_PAGE_CACHE_DIR", None)
+    if not directory:
+        return None
+
+    with _cache_lock:
+        if _cache is None or _cache.directory != str(directory):
+            _cache = PageCache(
+                directory,
+                ttl=getattr(settings, "SULEKHA_PAGE_CACHE_TTL", DEFAULT_TTL),
+                max_bytes=getattr(settings, "SULEKHA_PAGE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES),
+            )
+        return _cache
@@ -0,0 +1,122 @@
+"""
+EventRecord: one scraped Sulekha event as a flat, slotted record.
+
+The listing-card extractor produces a record with the card fields filled
+in, parse_event_details() one with the detail-page fields, and
+merge_event_details() copies the latter into the former. Field names are
+the CommunityEvents column names wherever a column exists, so
+column_values() is the single mapping onto the model; everything else the
+detail pages carry (maps, tour dates, organizer events) is never kept.
+"""
+
+from dataclasses import dataclass, fields
+from typing import Optional
+
+# Seen in merged records whose detail page could not be fetched
+DETAILS_ERROR = "Error fetching details"
+
+
+@dataclass(slots=True)
+class EventRecord:
+    # Listing card
+    event_id: Optional[str] = None
+    name: str = ""
+    event_url: str = ""
+    event_date: str = ""
+    start_local: Optional[str] = None
+    end_local: Optional[str] = None
+    venue: str = ""
+    location: str = ""
+    price: str = ""
+    status: str = ""
+    category: Optional[str] = None
+    performers: Optional[list] = None
+    cover_image: Optional[str] = None
+    action_type: str = ""
+    filter_url: Optional[str] = None
+
+    # Detail page
+    description: str = ""
+    venue_name: str = ""
+    venue_full_address: str = ""
+    venue_street: str = ""
+    venue_city: str = ""
+    venue_state: str = ""
+    venue_zip: str = ""
+    terms_title: str = ""
+    terms_location: str = ""
+    terms_list: Optional[list] = None
+    artist_name: str = ""
+    artist_image: str = ""
+    artist_description: str = ""
+    artist_link: str = ""
+    organizer_name: str = ""
+    organizer_logo: str = ""
+    organizer_events_link: str = ""
+    organizer_upcoming_count: str = ""
+    organizer_follow_available: bool = False
+    ticket_types: Optional[list] = None
+    ticket_action_button: str = ""
+
+    # Incremental crawls: details are to be filled in from the stored row
+    stored_details: bool = False
+
+    def merge_details(self, details):
+        """ Copy the detail-page fields of another record into this one """
+        for name in DETAIL_FIELDS:
+            setattr(self, name, getattr(details, name))
+        return self
+
+    def column_values(self):
+        """ CommunityEvents column -> value for every column the record carries """
+        values = {name: getattr(self, name) for name in COLUMN_FIELDS}
+        for name in JSON_LIST_FIELDS:
+            values[name] = json_list(values[name])
+        return values
+
+    def as_dict(self):
+        """ Plain dict of every field, e.g. for JSON """
+        return {name: getattr(self, name) for name in FIELD_NAMES}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: value for name, value in data.items() if name in FIELD_NAMES})
+
+
+FIELD_NAMES = tuple(field.name for field in fields(EventRecord))
+
+CARD_FIELDS = FIELD_NAMES[: FIELD_NAMES.index("description")]
+DETAIL_FIELDS = FIELD_NAMES[FIELD_NAMES.index("description") : FIELD_NAMES.index("stored_details")]
+
+# Fields that are not CommunityEvents columns: the typed dates are derived
+# from start_local/end_local during ingest
+COLUMN_FIELDS = tuple(
+    name for name in FIELD_NAMES if name not in ("start_local", "end_local", "filter_url", "stored_details")
+)
+
+# JSON list columns; missing or placeholder values are stored as []
+JSON_LIST_FIELDS = ("performers", "terms_list", "ticket_types")
+
+
+def json_list(value):
+    """ Scraped list for a JSON column; "N/A" and other placeholders become [] """
+    return list(value) if isinstance(value, (list, tuple)) else []
+
+
+def details_error():
+    """ Detail-page record used when an event's page cannot be fetched """
+    return EventRecord(description=DETAILS_ERROR)
+
+
+def encode_record(value):
+    """ json.dumps(default=...) hook, e.g. for the page cache """
+    if isinstance(value, EventRecord):
+        return {"__event_record__": value.as_dict()}
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def decode_record(data):
+    """ json.loads(object_hook=...) counterpart of encode_record """
+    if "__event_record__" in data:
+        return EventRecord.from_dict(data["__event_record__"])
+    return data
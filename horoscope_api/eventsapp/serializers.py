@@ -0,0 +1,48 @@
+from rest_framework import serializers
+
+from .models import CommunityEvents
+
+# Columns returned by the list endpoint; the large text columns
+# (description, terms_list, artist_description, ticket_types, ...) are only
+# loaded by the detail endpoint
+LIST_FIELDS = [
+    "id",
+    "name",
+    "date",
+    "time",
+    "event_date",
+    "event_start",
+    "event_end",
+    "location",
+    "city",
+    "state",
+    "venue",
+    "category",
+    "status",
+    "price",
+    "min_ticket_price",
+    "cover_image",
+    "event_url",
+    "latitude",
+    "longitude",
+    "updated_at",
+]
+
+
+class CommunityEventListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CommunityEvents
+        fields = LIST_FIELDS
+
+
+class NearbyCommunityEventSerializer(CommunityEventListSerializer):
+    distance_miles = serializers.FloatField(read_only=True)
+
+    class Meta(CommunityEventListSerializer.Meta):
+        fields = LIST_FIELDS + ["distance_miles"]
+
+
+class CommunityEventDetailSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CommunityEvents
+        exclude = ["content_hash"]
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+
+from django.conf import settings
+
+from horoscope_api.metrics import REGISTRY
+
+from . import async_scraper
+from .async_scraper import (
+    BURST,
+    MAX_CONCURRENCY,
+    MAX_CONCURRENCY_PER_HOST,
+    REQUESTS_PER_SECOND,
+    STREAM_BUFFER,
+    iter_stream_metros,
+    queue_put,
+)
+
+logger = logging.getLogger(__name__)
+
+SHARD_DONE = "__shard_done__"
+SHARD_FAILED = "__shard_failed__"
+SHARD_METRICS = "__shard_metrics__"
+
+
+def shard_metros(metros, shards):
+    """ Split metros round-robin into at most `shards` non-empty lists """
+    metros = list(metros)
+    shards = max(1, min(shards, len(metros)))
+    return [metros[i::shards] for i in range(shards)]
+
+
+def _crawl_shard(shard_index, metros, results, limits, shard_limits):
+    """
+    Child process entry point: fetch and parse one shard of metros with the
+    async engine and stream its events back to the parent as they are
+    scraped. Children never touch the database; their metrics are sent back
+    when they finish. Spawned children re-import every module, so everything
+    they need from the parent (base URL, page cache directory, known cards)
+    comes in limits and shard_limits rather than module globals.
+    """
+
+    async def produce():
+        async for item in iter_stream_metros(metros, **limits, **shard_limits):
+            await queue_put(results, item)
+
+    try:
+        asyncio.run(produce())
+    except Exception as e:
+        logger.exception(f"Crawl shard {shard_index} failed")
+        results.put((SHARD_FAILED, shard_index, repr(e)))
+    finally:
+        results.put((SHARD_METRICS, shard_index, REGISTRY.snapshot()))
+        results.put((SHARD_DONE, shard_index, None))
+
+
+def scrape_metros_sharded(
+    metros,
+    processes=None,
+    concurrency=MAX_CONCURRENCY,
+    per_host=MAX_CONCURRENCY_PER_HOST,
+    rate=REQUESTS_PER_SECOND,
+    burst=BURST,
+    known_for=None,
+    base_url=None,
+    cache_dir=None,
+):
+    """
+    Crawl metros across a pool of processes so HTML parsing is not bound to
+    one core. Yields the iter_stream_metros items of every shard in the
+    calling process, which stays the single database writer. The concurrency and
+    rate limits are crawl-wide and are divided between the shards. For
+    incremental mode, known_for(metros) returns the known cards of one
+    shard's metros (see incremental.load_known_cards), so each shard is only
+    sent its own. base_url and cache_dir default to this process's
+    SULEKHA_BASE_URL and SULEKHA_PAGE_CACHE_DIR.
+    """
+    shards = shard_metros(metros, processes or os.cpu_count() or 1)
+    if not shards or not shards[0]:
+        return
+
+    count = len(shards)
+    limits = {
+        "concurrency": max(1, concurrency // count),
+        "per_host": max(1, per_host // count),
+        "rate": rate / count,
+        "burst": max(1, burst // count),
+        "base_url": base_url or async_scraper.SULEKHA_BASE_URL,
+        "cache_dir": getattr(settings, "SULEKHA_PAGE_CACHE_DIR", "") if cache_dir is None else cache_dir,
+    }
+
+    # spawn, not fork: the parent holds database connections and threads
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue(maxsize=STREAM_BUFFER * count)
+    workers = [
+        context.Process(
+            target=_crawl_shard,
+            args=(index, shard, results, limits, {"known": known_for(shard) if known_for else None}),
+            name=f"sulekha-shard-{index}",
+            daemon=True,
+        )
+        for index, shard in enumerate(shards)
+    ]
+    for worker in workers:
+        worker.start()
+
+    running = count
+    try:
+        while running:
+            try:
+                item = results.get(timeout=5)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    logger.error("Crawl shards exited without reporting completion")
+                    break
+                continue
+
+            if item[0] == SHARD_DONE:
+                running -= 1
+            elif item[0] == SHARD_METRICS:
+                REGISTRY.merge(item[2])
+            elif item[0] == SHARD_FAILED:
+                logger.error(f"Crawl shard {item[1]} failed: {item[2]}")
+            else:
+                yield item
+    finally:
+        for worker in workers:
+            if worker.is_alive() and running:
+                worker.terminate()
+            worker.join()
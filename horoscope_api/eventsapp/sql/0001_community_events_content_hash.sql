@@ -0,0 +1,4 @@
+-- community_events is unmanaged (Meta.managed = False) and migrations are
+-- disabled for this project, so schema changes are applied by hand.
+-- Fingerprint of the normalized scraped payload (eventsapp.ingest.event_fingerprint).
+ALTER TABLE community_events ADD COLUMN IF NOT EXISTS content_hash varchar(64) NULL;
@@ -0,0 +1,26 @@
+-- Database-backed queue for the events crawl (eventsapp.models.CrawlJob).
+CREATE TABLE IF NOT EXISTS crawl_jobs (
+    id bigserial PRIMARY KEY,
+    status varchar(20) NOT NULL DEFAULT 'queued',
+    metros_total integer NOT NULL DEFAULT 0,
+    metros_done integer NOT NULL DEFAULT 0,
+    progress jsonb NOT NULL DEFAULT '{}'::jsonb,
+    counts jsonb NOT NULL DEFAULT '{}'::jsonb,
+    error text NULL,
+    worker varchar(255) NULL,
+    created_at timestamp with time zone NOT NULL DEFAULT now(),
+    started_at timestamp with time zone NULL,
+    finished_at timestamp with time zone NULL
+);
+
+-- Workers poll for the oldest queued job
+CREATE INDEX IF NOT EXISTS crawl_jobs_status_id_idx ON crawl_jobs (status, id);
+
+-- Running workers bump heartbeat_at; running jobs whose heartbeat stops
+-- (killed worker) are failed so a new crawl can be queued (eventsapp.jobs)
+ALTER TABLE crawl_jobs ADD COLUMN IF NOT EXISTS heartbeat_at timestamp with time zone NULL;
+
+-- At most one queued and one running job; concurrent enqueues cannot both
+-- create a job
+CREATE UNIQUE INDEX IF NOT EXISTS crawl_jobs_one_active_idx
+    ON crawl_jobs (status) WHERE status IN ('queued', 'running');
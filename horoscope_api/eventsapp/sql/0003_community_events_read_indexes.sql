@@ -0,0 +1,12 @@
+-- Indexes for the community-events read API (eventsapp.views.CommunityEventListAPIView).
+-- The filters are case-insensitive, which Django renders as
+-- UPPER(col::text) = UPPER(value), so the indexes are on the same expressions.
+-- Pagination is keyset on the primary key, which already has an index.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS community_events_city_idx ON community_events (UPPER(city::text));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS community_events_state_idx ON community_events (UPPER(state::text));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS community_events_category_idx ON community_events (UPPER(category::text));
+CREATE INDEX CONCURRENTLY IF NOT EXISTS community_events_status_idx ON community_events (UPPER(status::text));
+
+-- date_from / date_to filter on event_start/event_end, indexed by 0004; an
+-- earlier version of this file indexed the date column, which nothing reads
+DROP INDEX CONCURRENTLY IF EXISTS community_events_date_idx;
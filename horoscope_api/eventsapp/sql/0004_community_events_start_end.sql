@@ -0,0 +1,9 @@
+-- Typed, timezone-aware event times parsed from the scraped event_date text
+-- (eventsapp.dates). Existing rows are filled by
+-- `python manage.py backfill_event_dates`.
+ALTER TABLE community_events ADD COLUMN IF NOT EXISTS event_start timestamp with time zone NULL;
+ALTER TABLE community_events ADD COLUMN IF NOT EXISTS event_end timestamp with time zone NULL;
+
+-- Range queries ("upcoming this weekend": event_start <= :to AND event_end >= :from)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS community_events_start_idx ON community_events (event_start);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS community_events_end_idx ON community_events (event_end);
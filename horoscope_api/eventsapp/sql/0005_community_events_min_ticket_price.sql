@@ -0,0 +1,6 @@
+-- Cheapest ticket price of an event (eventsapp.ingest.min_ticket_price), so
+-- events can be filtered and sorted by price in SQL. Apply before deploying;
+-- existing rows are filled by `python manage.py convert_event_json_columns`.
+ALTER TABLE community_events ADD COLUMN IF NOT EXISTS min_ticket_price numeric(10, 2) NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS community_events_min_price_idx ON community_events (min_ticket_price);
@@ -0,0 +1,15 @@
+-- performers, terms_list and ticket_types become jsonb. Older rows hold the
+-- Python repr of a list, which Postgres cannot cast, so first run
+--     python manage.py convert_event_json_columns
+-- which rewrites every value as JSON text; the casts below then succeed.
+BEGIN;
+
+ALTER TABLE community_events
+    ALTER COLUMN performers TYPE jsonb USING NULLIF(performers, '')::jsonb,
+    ALTER COLUMN terms_list TYPE jsonb USING NULLIF(terms_list, '')::jsonb,
+    ALTER COLUMN ticket_types TYPE jsonb USING NULLIF(ticket_types, '')::jsonb;
+
+COMMIT;
+
+-- Containment queries such as ticket_types @> '[{"category": "VIP"}]'
+CREATE INDEX CONCURRENTLY IF NOT EXISTS community_events_ticket_types_idx ON community_events USING gin (ticket_types jsonb_path_ops);
@@ -0,0 +1,13 @@
+-- Event coordinates from Mastercity (eventsapp.ingest.event_location) for
+-- radius search without PostGIS (eventsapp.geo). Existing rows are filled by
+-- `python manage.py backfill_event_locations`.
+ALTER TABLE community_events ADD COLUMN IF NOT EXISTS latitude double precision NULL;
+ALTER TABLE community_events ADD COLUMN IF NOT EXISTS longitude double precision NULL;
+ALTER TABLE community_events ADD COLUMN IF NOT EXISTS geohash varchar(12) NULL;
+
+-- geohash LIKE 'prefix%' candidate lookup; pattern ops so LIKE can use the
+-- index under any collation
+CREATE INDEX CONCURRENTLY IF NOT EXISTS community_events_geohash_idx ON community_events (geohash varchar_pattern_ops);
+
+-- Bounding-box refinement
+CREATE INDEX CONCURRENTLY IF NOT EXISTS community_events_lat_lon_idx ON community_events (latitude, longitude);
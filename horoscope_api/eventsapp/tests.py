@@ -1,3 +1,812 @@
-from django.test import TestCase
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import async_scraper, city_index, incremental, ingest, utils
+from .crawl import run_crawl
+from .dates import parse_event_date_range
+from .detail_memo import DetailMemo
+from .geo import bounding_box, covering_geohashes, encode_geohash, haversine_miles
+from .http_client import HttpClient
+from .ingest import event_fingerprint, ingest_city_events, normalize_event
+from .jobs import claim_next_job, enqueue_crawl, fail_stale_jobs
+from .models import CommunityEvents, CrawlJob, Mastercity
+from .page_cache import PageCache, fetch_parsed
+from .records import EventRecord
+from .utils import ListingError, parse_event_sections, parse_sulekha_listing
+
+TESTDATA = Path(__file__).resolve().parent / "testdata" / "sulekha"
+
+# The saved listing with every event link on the local test site
+LISTING_HTML = (TESTDATA / "listing_bay_area.html").read_text(encoding="utf-8").replace("https://events.example", "")
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """ Serves one page with an ETag and answers If-None-Match with 304 """
+
+    etag = '"v1"'
+    body = b"<html><body><p>page</p></body></html>"
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _SulekhaSiteHandler(BaseHTTPRequestHandler):
+    """ Serves the saved listing for any metro and the full detail page for /detail/<id> """
+
+    listing = LISTING_HTML
+    detail = (TESTDATA / "detail_full.html").read_text(encoding="utf-8")
+    requests_seen = []
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        self.requests_seen.append(path)
+        body = (self.detail if path.startswith("/detail/") else self.listing).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SulekhaSiteMixin:
+    """ Points the scrapers at a local _SulekhaSiteHandler server for the duration of a test """
+
+    def start_site(self):
+        _SulekhaSiteHandler.requests_seen = []
+        self.addCleanup(setattr, _SulekhaSiteHandler, "listing", LISTING_HTML)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _SulekhaSiteHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        self.base_url = f"http://127.0.0.1:{server.server_port}"
+        for module in (utils, async_scraper, ingest, incremental):
+            patcher = mock.patch.object(module, "SULEKHA_BASE_URL", self.base_url)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return self.base_url
+
+
+def listing_records():
+    """ The cards of the saved listing as EventRecords """
+    listing = parse_sulekha_listing(LISTING_HTML, "bay-area", fetch_details=False)
+    return [event for events in listing.values() for event in events]
+
+
+class PageCacheTests(SimpleTestCase):
+    def setUp(self):
+        _PageHandler.requests_seen = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/event"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = HttpClient(max_retries=0)
+        self.parses = 0
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.client.close()
+        self.tmp.cleanup()
+
+    def parse(self, html):
+        self.parses += 1
+        return {"length": len(html)}
+
+    def test_miss_then_fresh_hit(self):
+        cache = PageCache(self.tmp.name, ttl=60)
+        first = fetch_parsed(cache, self.client, self.url, self.parse)
+        second = fetch_parsed(cache, self.client, self.url, self.parse)
+
+        self.assertEqual(first, second)
+        self.assertEqual(_PageHandler.requests_seen, [None])
+        self.assertEqual(self.parses, 1)
+        self.assertEqual(cache.stats["misses"], 1)
+        self.assertEqual(cache.stats["hits"], 1)
+
+    def test_stale_entry_is_revalidated_without_parsing(self):
+        cache = PageCache(self.tmp.name, ttl=0)
+        fetch_parsed(cache, self.client, self.url, self.parse)
+        result = fetch_parsed(cache, self.client, self.url, self.parse)
+
+        self.assertEqual(result, {"length": len(_PageHandler.body)})
+        self.assertEqual(_PageHandler.requests_seen, [None, '"v1"'])
+        self.assertEqual(self.parses, 1)
+        self.assertEqual(cache.stats["revalidated"], 1)
+
+    def test_lru_eviction_keeps_cache_under_budget(self):
+        cache = PageCache(self.tmp.name, ttl=60, max_bytes=600)
+        for i in range(10):
+            cache.store(f"{self.url}/{i}", "x" * 100, {}, {"i": i})
+
+        self.assertLessEqual(cache._size, 600)
+        self.assertGreater(cache.stats["evicted"], 0)
+        self.assertIsNotNone(cache.lookup(f"{self.url}/9")[0])
+
+
+class DetailMemoTests(SimpleTestCase):
+    def setUp(self):
+        self.fetches = []
+
+    def fetch(self, url):
+        self.fetches.append(url)
+        time.sleep(0.05)
+        return {"url": url}
+
+    def test_concurrent_threads_share_one_fetch(self):
+        memo = DetailMemo()
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(memo.get("/detail/1", self.fetch)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.fetches, ["/detail/1"])
+        self.assertEqual(results, [{"url": "/detail/1"}] * 8)
+        self.assertEqual(memo.stats["misses"], 1)
+        self.assertEqual(memo.stats["hits"] + memo.stats["shared"], 7)
+
+    def test_concurrent_coroutines_share_one_fetch(self):
+        memo = DetailMemo()
+
+        async def fetch(url):
+            self.fetches.append(url)
+            await asyncio.sleep(0.05)
+            return {"url": url}
+
+        async def crawl():
+            return await asyncio.gather(*(memo.aget(f"/detail/{i % 2}", fetch) for i in range(6)))
+
+        results = asyncio.run(crawl())
+        self.assertEqual(sorted(self.fetches), ["/detail/0", "/detail/1"])
+        self.assertEqual(results[2], {"url": "/detail/0"})
+        self.assertEqual(memo.stats["shared"], 4)
+        self.assertAlmostEqual(memo.hit_rate(), 4 / 6)
+
+    def test_failures_are_not_kept_and_old_entries_are_evicted(self):
+        memo = DetailMemo(max_entries=2)
+
+        def failing(url):
+            raise ConnectionError(url)
+
+        with self.assertRaises(ConnectionError):
+            memo.get("/detail/1", failing)
+        for i in range(1, 4):
+            memo.get(f"/detail/{i}", self.fetch)
+        memo.get("/detail/3", self.fetch)
+
+        self.assertEqual(self.fetches, ["/detail/1", "/detail/2", "/detail/3"])
+        self.assertEqual(memo.stats["evictions"], 1)
+        self.assertEqual(memo.stats["hits"], 1)
+
+
+class GoldenCorpusTests(SimpleTestCase):
+    """
+    Saved Sulekha pages must parse to the stored golden output with every
+    parser backend
+    """
+
+    def parse(self, path):
+        html = path.read_text(encoding="utf-8")
+        if path.name.startswith("listing"):
+            listing = parse_sulekha_listing(html, "bay-area", fetch_details=False)
+            return {section: [event.as_dict() for event in events] for section, events in listing.items()}
+        return parse_event_sections(html)
+
+    def test_backends_match_golden_output(self):
+        pages = sorted(TESTDATA.glob("*.html"))
+        self.assertTrue(pages)
+        for parser in ("html.parser", "lxml"):
+            for page in pages:
+                with self.subTest(parser=parser, page=page.name), override_settings(HTML_PARSER=parser):
+                    expected = json.loads(page.with_suffix(".json").read_text(encoding="utf-8"))
+                    self.assertEqual(self.parse(page), expected)
+
+
+class StaleDeletionTests(SulekhaSiteMixin, TestCase):
+    """ Rows are only deleted when a complete, non-empty listing no longer has them """
+
+    def crawl(self):
+        outcomes = []
+        counts = run_crawl(
+            {"bay-area": ["San Jose"]},
+            on_metro_done=lambda metro, cities, counts, error: outcomes.append(error),
+        )
+        return counts, outcomes
+
+    def test_listing_without_events_section_is_an_error(self):
+        with self.assertRaises(ListingError):
+            parse_sulekha_listing("<html><body>Access denied</body></html>", "bay-area")
+
+    def test_blocked_listing_keeps_stored_rows(self):
+        self.start_site()
+        counts, outcomes = self.crawl()
+        self.assertEqual(counts["inserted"], 3)
+        self.assertEqual(outcomes, [None])
+
+        _SulekhaSiteHandler.listing = "<html><body>Access denied</body></html>"
+        counts, outcomes = self.crawl()
+        self.assertEqual(counts["removed"], 0)
+        self.assertIn("Upcoming Events", outcomes[0])
+        self.assertEqual(CommunityEvents.objects.filter(city="San Jose").count(), 3)
+
+    def test_empty_listing_keeps_stored_rows(self):
+        self.start_site()
+        ingest_city_events("San Jose", listing_records(), state_name="California")
+
+        counts = ingest_city_events("San Jose", [], state_name="California")
+        self.assertEqual(counts["removed"], 0)
+        self.assertEqual(CommunityEvents.objects.filter(city="San Jose").count(), 3)
+
+    def test_events_missing_from_a_complete_listing_are_removed(self):
+        self.start_site()
+        events = listing_records()
+        ingest_city_events("San Jose", events, state_name="California")
+
+        counts = ingest_city_events("San Jose", events[1:], state_name="California")
+        self.assertEqual(counts["removed"], 1)
+        self.assertFalse(CommunityEvents.objects.filter(event_id=events[0].event_id).exists())
+
+
+class GeoTests(SimpleTestCase):
+    def test_encode_geohash(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(encode_geohash(42.6, -5.6, 5), "ezs42")
+        self.assertEqual(encode_geohash(37.3382, -121.8863, 5), encode_geohash(37.3382, -121.8863)[:5])
+
+    def test_bounding_box(self):
+        min_lat, max_lat, min_lon, max_lon = bounding_box(0, 0, 69)
+        self.assertAlmostEqual(min_lat, -1)
+        self.assertAlmostEqual(max_lat, 1)
+        self.assertAlmostEqual(max_lon, 1)
+
+        # Longitude degrees shrink with latitude, and the box is clipped at the poles
+        min_lat, max_lat, min_lon, max_lon = bounding_box(60, -150, 69)
+        self.assertAlmostEqual(max_lon - min_lon, 4)
+        self.assertEqual(bounding_box(89.9, 0, 69)[1::2], (90.0, 180.0))
+
+    def test_covering_geohashes_contain_every_point_in_the_circle(self):
+        for latitude, longitude, miles in [(37.3382, -121.8863, 25), (47.6062, -122.3321, 3), (40.7128, -74.0060, 150)]:
+            prefixes = covering_geohashes(latitude, longitude, miles)
+            self.assertLessEqual(len(prefixes), 16)
+            min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, miles)
+            for i in range(11):
+                for j in range(11):
+                    lat = min_lat + (max_lat - min_lat) * i / 10
+                    lon = min_lon + (max_lon - min_lon) * j / 10
+                    if haversine_miles(latitude, longitude, lat, lon) > miles:
+                        continue
+                    with self.subTest(center=(latitude, longitude), point=(lat, lon)):
+                        self.assertTrue(encode_geohash(lat, lon).startswith(tuple(prefixes)))
+
+    def test_bounding_box_contains_the_circle(self):
+        latitude, longitude, miles = 37.3382, -121.8863, 25
+        min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, miles)
+        self.assertLess(haversine_miles(latitude, longitude, min_lat, longitude), miles + 0.1)
+        self.assertGreater(haversine_miles(latitude, longitude, latitude, max_lon), miles - 0.1)
+
+
+class EventDateParsingTests(SimpleTestCase):
+    CASES = [
+        ("Sat, Mar 15, 2025 07:00 PM", ("2025-03-15T19:00:00", None)),
+        ("Fri, Apr 4, 2025 - Sun, Apr 6, 2025", ("2025-04-04", "2025-04-06")),
+        ("Sat, Mar 15, 2025 07:00 PM - 10:00 PM", ("2025-03-15T19:00:00", "2025-03-15T22:00:00")),
+        ("Saturday, March 15, 2025 at 7 p.m.", ("2025-03-15T19:00:00", None)),
+        ("Sun, Sept 7, 2025", ("2025-09-07", None)),
+        ("Sat, 15 Mar 2025 07:00 PM", ("2025-03-15T19:00:00", None)),
+        ("Sunday, 7 September 2025", ("2025-09-07", None)),
+        ("Sat, Mar 15, 2025 07:00 PM onwards", ("2025-03-15T19:00:00", None)),
+        ("Sat, Mar 15, 2025 07:00 PM (PST)", ("2025-03-15T19:00:00", None)),
+        ("Sat, Mar 15, 2025 07:00 PM onwards (PST)", ("2025-03-15T19:00:00", None)),
+        ("Sat, 15 Mar 2025 07:00 PM - 10:00 PM (PST)", ("2025-03-15T19:00:00", "2025-03-15T22:00:00")),
+        ("Sat, Mar 15, 2025 10:00 PM to Sun, 16 Mar 2025 1 AM", ("2025-03-15T22:00:00", "2025-03-16T01:00:00")),
+        ("Sat, Feb 30, 2025", (None, None)),
+        ("Date to be announced", (None, None)),
+        ("", (None, None)),
+        (None, (None, None)),
+    ]
+
+    def test_parse_event_date_range(self):
+        for text, expected in self.CASES:
+            with self.subTest(text=text):
+                self.assertEqual(parse_event_date_range(text), expected)
+
+
+class MastercityIndexTests(TestCase):
+    def setUp(self):
+        Mastercity.objects.create(city="St. Louis", state="Missouri", lat="38.627", long="-90.199")
+        Mastercity.objects.create(city="San Jose", state="California", lat="37.338", long="-121.886")
+        self.index = city_index.MastercityIndex(ttl=60)
+        self.index.get("San Jose")  # load the table
+
+    def test_lookup_by_normalized_name_and_slug(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.index.get("  st louis ")["state"], "Missouri")
+            self.assertEqual(self.index.get("ST. LOUIS")["state"], "Missouri")
+            self.assertEqual(self.index.get("st-louis")["state"], "Missouri")
+            self.assertEqual(self.index.state_for("san-jose"), "California")
+
+    def test_miss_falls_back_to_one_query_and_is_cached(self):
+        Mastercity.objects.create(city="Fremont", state="California")
+        with self.assertNumQueries(1):
+            self.assertEqual(self.index.get("FREMONT")["state"], "California")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.index.get("fremont")["state"], "California")
+
+    def test_unknown_cities_are_cached_as_missing(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.index.get("Atlantis"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.index.get("Atlantis"))
+            self.assertIsNone(self.index.state_for("atlantis"))
+
+    def test_reloads_after_the_ttl(self):
+        self.index.get("Atlantis")
+        Mastercity.objects.create(city="Atlantis", state="Nevada")
+        with mock.patch.object(city_index.time, "monotonic", return_value=time.monotonic() + 30):
+            self.assertIsNone(self.index.get("Atlantis"))
+        with mock.patch.object(city_index.time, "monotonic", return_value=time.monotonic() + 61):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.index.state_for("Atlantis"), "Nevada")
+
+    def test_events_of_an_unknown_city_are_ingested(self):
+        with mock.patch.object(city_index, "_index", None):
+            counts = ingest_city_events("Atlantis", listing_records())
+        self.assertEqual(counts["inserted"], 3)
+        self.assertEqual(set(CommunityEvents.objects.filter(city="Atlantis").values_list("state", flat=True)), {None})
+
+
+class UpsertTests(TestCase):
+    """ ingest_city_events inserts, updates, keeps and removes rows by natural key """
+
+    def ingest(self, events):
+        return ingest_city_events("San Jose", events, state_name="California")
+
+    def test_counts_per_outcome(self):
+        events = listing_records()
+        self.assertEqual(self.ingest(events), {"inserted": 3, "updated": 0, "unchanged": 0, "removed": 0})
+        self.assertEqual(self.ingest(events), {"inserted": 0, "updated": 0, "unchanged": 3, "removed": 0})
+
+        events[0].price = "Starts at $99"
+        self.assertEqual(self.ingest(events[:2]), {"inserted": 0, "updated": 1, "unchanged": 1, "removed": 1})
+        self.assertEqual(
+            list(CommunityEvents.objects.filter(city="San Jose").order_by("event_id").values_list("event_id", "price")),
+            [("1001", "Starts at $99"), ("1002", "Starts at $15.00")],
+        )
+
+    def test_duplicate_events_are_written_once(self):
+        events = listing_records()
+        counts = self.ingest(events + events)
+        self.assertEqual(counts["inserted"], 3)
+        self.assertEqual(CommunityEvents.objects.filter(city="San Jose").count(), 3)
+
+
+class ContentHashTests(TestCase):
+    """ Rows whose content_hash matches the scraped event are not rewritten """
+
+    def setUp(self):
+        self.events = listing_records()
+        ingest_city_events("San Jose", self.events, state_name="California")
+        self.stored = dict(CommunityEvents.objects.values_list("event_id", "updated_at"))
+
+    def test_stored_hash_is_the_normalized_fingerprint(self):
+        row = CommunityEvents.objects.get(event_id="1001")
+        values = normalize_event(self.events[0], "San Jose", "California")
+        self.assertEqual(row.content_hash, event_fingerprint(values))
+
+    def test_unchanged_rows_are_skipped(self):
+        with self.assertNumQueries(3):  # load the city's rows, plus the savepoint of the empty batch
+            counts = ingest_city_events("San Jose", self.events, state_name="California")
+        self.assertEqual(counts["unchanged"], 3)
+        self.assertEqual(dict(CommunityEvents.objects.values_list("event_id", "updated_at")), self.stored)
+
+    def test_touch_unchanged_only_bumps_updated_at(self):
+        counts = ingest_city_events("San Jose", self.events, state_name="California", touch_unchanged=True)
+        self.assertEqual(counts["unchanged"], 3)
+        row = CommunityEvents.objects.get(event_id="1001")
+        self.assertGreater(row.updated_at, self.stored["1001"])
+        self.assertEqual(row.content_hash, event_fingerprint(normalize_event(self.events[0], "San Jose", "California")))
+
+
+class CrawlJobQueueTests(TestCase):
+    def test_enqueue_returns_the_active_job(self):
+        job, created = enqueue_crawl()
+        self.assertTrue(created)
+        self.assertEqual(enqueue_crawl(), (job, False))
+
+        claimed = claim_next_job("worker-1")
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertIsNotNone(claimed.heartbeat_at)
+        self.assertEqual(enqueue_crawl(), (job, False))
+
+    def test_only_one_job_can_be_queued(self):
+        CrawlJob.objects.create()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CrawlJob.objects.create()
+
+    def test_job_of_a_dead_worker_is_failed(self):
+        enqueue_crawl()
+        job = claim_next_job("worker-1")
+        CrawlJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        new_job, created = enqueue_crawl()
+        self.assertTrue(created)
+        job.refresh_from_db()
+        self.assertEqual(job.status, CrawlJob.STATUS_FAILED)
+        self.assertIn("heartbeat", job.error)
+        self.assertEqual(fail_stale_jobs(), 0)
+        self.assertEqual(claim_next_job("worker-2").pk, new_job.pk)
+
+
+class ShardedCrawlTests(SulekhaSiteMixin, TestCase):
+    """ Spawned shard processes crawl the site of the parent, not the live one """
+
+    def test_shards_use_the_parent_base_url(self):
+        self.start_site()
+        plan = {"bay-area": ["San Jose"], "south-bay": ["Fremont"]}
+
+        counts = run_crawl(plan, processes=2)
+        self.assertEqual(counts["inserted"], 6)
+        self.assertIn("/bay-area", _SulekhaSiteHandler.requests_seen)
+        self.assertIn("/south-bay", _SulekhaSiteHandler.requests_seen)
+        self.assertEqual(
+            CommunityEvents.objects.filter(event_url__startswith=self.base_url).count(), 4
+        )
+
+        _SulekhaSiteHandler.requests_seen = []
+        counts = run_crawl(plan, processes=2, incremental=True)
+        self.assertEqual(counts["unchanged"], 6)
+        self.assertNotIn("/detail/1001", _SulekhaSiteHandler.requests_seen)
+
+
+class CommunityEventsApiTests(TestCase):
+    """ The read API: cursor pagination, filters, radius search and detail """
+
+    def setUp(self):
+        now = timezone.now()
+        self.events = {}
+        for name, city, category, price, latitude, longitude in [
+            ("Diwali Mela", "San Jose", "Festival", "10", 37.3382, -121.8863),
+            ("Garba Night", "Fremont", "Dance", "25", 37.5485, -121.9886),
+            ("Comedy Hour", "San Jose", "Comedy", "40", 37.3541, -121.9552),
+            ("Holi Fest", "Seattle", "Festival", "15", 47.6062, -122.3321),
+        ]:
+            self.events[name] = CommunityEvents.objects.create(
+                name=name,
+                location=city,
+                city=city,
+                state="Washington" if city == "Seattle" else "California",
+                category=category,
+                status="Active",
+                min_ticket_price=price,
+                description=f"About {name}",
+                latitude=latitude,
+                longitude=longitude,
+                geohash=encode_geohash(latitude, longitude),
+                created_at=now,
+                updated_at=now,
+            )
+
+    def names(self, response):
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        if isinstance(rows, dict):
+            rows = rows["results"]
+        return [row["name"] for row in rows]
+
+    def test_cursor_pages_cover_every_row_newest_first(self):
+        response = self.client.get("/api/v1/community-events/", {"page_size": 3})
+        first = response.json()
+        self.assertEqual([row["name"] for row in first["results"]], ["Holi Fest", "Comedy Hour", "Garba Night"])
+        self.assertNotIn("description", first["results"][0])
+        self.assertIn("event_start", first["results"][0])
+        self.assertIn("event_end", first["results"][0])
+
+        second = self.client.get(first["next"]).json()
+        self.assertEqual([row["name"] for row in second["results"]], ["Diwali Mela"])
+        self.assertIsNone(second["next"])
+
+    def test_filters(self):
+        url = "/api/v1/community-events/"
+        self.assertEqual(self.names(self.client.get(url, {"city": "san jose"})), ["Comedy Hour", "Diwali Mela"])
+        self.assertEqual(self.names(self.client.get(url, {"category": "FESTIVAL", "state": "california"})), ["Diwali Mela"])
+        self.assertEqual(self.names(self.client.get(url, {"max_price": "15"})), ["Holi Fest", "Diwali Mela"])
+        for max_price in ("cheap", "NaN", "sNaN", "Infinity", "-inf"):
+            with self.subTest(max_price=max_price):
+                self.assertEqual(self.client.get(url, {"max_price": max_price}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"date_from": "next week"}).status_code, 400)
+
+    def test_date_range_keeps_overlapping_events(self):
+        day = timezone.make_aware(datetime(2025, 3, 15))
+        spans = {
+            "Diwali Mela": (day - timedelta(days=2), day + timedelta(days=1)),  # Mar 13 - 16
+            "Garba Night": (day + timedelta(hours=19), None),  # Mar 15, 7 PM
+            "Comedy Hour": (day - timedelta(days=3), day - timedelta(days=2)),  # Mar 12 - 13
+            "Holi Fest": (day + timedelta(days=5), day + timedelta(days=6)),  # Mar 20 - 21
+        }
+        for name, (start, end) in spans.items():
+            CommunityEvents.objects.filter(pk=self.events[name].pk).update(event_start=start, event_end=end)
+
+        url = "/api/v1/community-events/"
+        self.assertEqual(
+            self.names(self.client.get(url, {"date_from": "2025-03-15", "date_to": "2025-03-15"})),
+            ["Garba Night", "Diwali Mela"],
+        )
+        self.assertEqual(self.names(self.client.get(url, {"date_from": "2025-03-16"})), ["Holi Fest", "Diwali Mela"])
+        self.assertEqual(self.names(self.client.get(url, {"date_to": "2025-03-13"})), ["Comedy Hour", "Diwali Mela"])
+
+        rows = {row["name"]: row for row in self.client.get(url).json()["results"]}
+        self.assertEqual(rows["Garba Night"]["event_start"], "2025-03-15T19:00:00Z")
+        self.assertIsNone(rows["Garba Night"]["event_end"])
+        self.assertEqual(rows["Diwali Mela"]["event_end"], "2025-03-16T00:00:00Z")
+
+    def test_nearby_orders_by_distance_within_the_radius(self):
+        url = "/api/v1/community-events/nearby/"
+        response = self.client.get(url, {"lat": 37.3382, "lon": -121.8863, "miles": 30})
+        self.assertEqual(self.names(response), ["Diwali Mela", "Comedy Hour", "Garba Night"])
+        for row in response.json():
+            event = self.events[row["name"]]
+            expected = haversine_miles(37.3382, -121.8863, event.latitude, event.longitude)
+            self.assertAlmostEqual(row["distance_miles"], expected, places=6)
+
+        response = self.client.get(url, {"lat": 37.3382, "lon": -121.8863, "miles": 30, "category": "dance"})
+        self.assertEqual(self.names(response), ["Garba Night"])
+        self.assertEqual(self.names(self.client.get(url, {"lat": 37.3382, "lon": -121.8863, "miles": 1})), ["Diwali Mela"])
+        self.assertEqual(self.client.get(url, {"lon": -121.8863}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"lat": 95, "lon": -121.8863}).status_code, 400)
+
+    def test_detail_includes_the_large_columns(self):
+        event = self.events["Garba Night"]
+        response = self.client.get(f"/api/v1/community-events/{event.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["description"], "About Garba Night")
+        self.assertNotIn("content_hash", response.json())
+        self.assertEqual(self.client.get("/api/v1/community-events/999999/").status_code, 404)
+
+
+class IncrementalCrawlTests(SulekhaSiteMixin, TestCase):
+    """ Incremental crawls reuse the stored details of unchanged cards """
+
+    def setUp(self):
+        self.start_site()
+        run_crawl({"bay-area": ["San Jose"]})
+        self.descriptions = dict(CommunityEvents.objects.values_list("event_id", "description"))
+        _SulekhaSiteHandler.requests_seen = []
+
+    def detail_requests(self):
+        return [path for path in _SulekhaSiteHandler.requests_seen if path.startswith("/detail/")]
+
+    def test_unchanged_cards_reuse_stored_details(self):
+        counts = run_crawl({"bay-area": ["San Jose"]}, incremental=True)
+        self.assertEqual(counts["unchanged"], 3)
+        self.assertEqual(self.detail_requests(), [])
+        self.assertEqual(dict(CommunityEvents.objects.values_list("event_id", "description")), self.descriptions)
+
+    def test_changed_card_is_fetched_again(self):
+        _SulekhaSiteHandler.listing = LISTING_HTML.replace("<b>$25</b>", "<b>$30</b>")
+        counts = run_crawl({"bay-area": ["San Jose"]}, incremental=True)
+        self.assertEqual(counts["updated"], 1)
+        self.assertEqual(counts["unchanged"], 2)
+        self.assertEqual(self.detail_requests(), ["/detail/1001"])
+        self.assertEqual(CommunityEvents.objects.get(event_id="1001").price, "Starts at $30")
+
+    def test_fill_stored_details_fetches_rows_changed_since_loading(self):
+        events = listing_records()
+        for event in events[:2]:
+            event.stored_details = True
+        CommunityEvents.objects.filter(event_id="1002").update(price="Starts at $1.00")
+
+        self.assertEqual(incremental.fill_stored_details(events), 1)
+        self.assertEqual(events[0].description, self.descriptions["1001"])
+        self.assertFalse(events[0].stored_details)
+        self.assertEqual(len(self.detail_requests()), 1)
+        self.assertNotEqual(events[1].description, "")
+        self.assertEqual(events[2].description, "")
+
+
+class CrawlBackpressureTests(SimpleTestCase):
+    def test_enrich_keeps_a_bounded_window_of_detail_fetches(self):
+        in_flight = []
+        peak = []
+
+        async def fetch_event_details(link):
+            in_flight.append(link)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.001)
+            in_flight.remove(link)
+            return EventRecord(description=link)
+
+        async def enrich():
+            scraper = async_scraper.AsyncSulekhaScraper(session=None, concurrency=2)
+            scraper.fetch_event_details = fetch_event_details
+            events = [EventRecord(event_url=f"/detail/{i}") for i in range(20)]
+            return [event async for event in scraper.enrich("bay-area", events)]
+
+        events = asyncio.run(enrich())
+        self.assertEqual(sorted(event.description for event in events), sorted(f"/detail/{i}" for i in range(20)))
+        self.assertEqual(max(peak), 4)
+
+    def test_closing_the_stream_stops_the_crawl_thread(self):
+        stopped = threading.Event()
+
+        async def endless():
+            try:
+                count = 0
+                while True:
+                    count += 1
+                    yield count
+            finally:
+                stopped.set()
+
+        with mock.patch.object(async_scraper, "STREAM_BUFFER", 2), mock.patch.object(async_scraper, "STOP_POLL_INTERVAL", 0.01):
+            items = async_scraper._iterate_in_thread(endless)
+            self.assertEqual([next(items) for _ in range(3)], [1, 2, 3])
+            time.sleep(0.05)  # let the producer block on the full buffer
+            items.close()
+            self.assertTrue(stopped.wait(5))
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    """ Answers every GET after a short delay, recording the peak number of concurrent requests """
+
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.active -= 1
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class AsyncScraperTests(SulekhaSiteMixin, SimpleTestCase):
+    def test_token_bucket_delays_the_request_over_the_rate(self):
+        async def acquire_times(count):
+            bucket = async_scraper.TokenBucket(rate=5, capacity=5)
+            started = time.monotonic()
+            times = []
+            for _ in range(count):
+                await bucket.acquire()
+                times.append(time.monotonic() - started)
+            return times
+
+        times = asyncio.run(acquire_times(6))
+        self.assertLess(times[4], 0.05)
+        self.assertGreaterEqual(times[5], 0.15)
+
+    def peak_concurrency(self, **limits):
+        _SlowHandler.peak = 0
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        async def fetch_all():
+            async with async_scraper.open_scraper(rate=1000, burst=1000, cache_dir="", **limits) as scraper:
+                urls = [f"http://127.0.0.1:{server.server_port}/page/{i}" for i in range(8)]
+                return await asyncio.gather(*(scraper.fetch(url) for url in urls))
+
+        self.assertEqual(asyncio.run(fetch_all()), ["ok"] * 8)
+        return _SlowHandler.peak
+
+    def test_concurrency_and_per_host_caps(self):
+        self.assertEqual(self.peak_concurrency(concurrency=2, per_host=6), 2)
+        self.assertEqual(self.peak_concurrency(concurrency=6, per_host=3), 3)
+
+    def test_async_scrape_matches_the_sync_scraper(self):
+        self.start_site()
+        with mock.patch.object(utils, "POLITENESS_DELAY", (0, 0)):
+            expected = utils.scrape_sulekha_events("bay-area", client=HttpClient())
+        expected = {section: [event.as_dict() for event in events] for section, events in expected.items()}
+        self.assertTrue(expected)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for _ in range(2):  # page cache miss, then hit
+                scraped = async_scraper.scrape_metros(["bay-area"], cache_dir=cache_dir)["bay-area"]
+                self.assertEqual(
+                    {section: [event.as_dict() for event in events] for section, events in scraped.items()}, expected
+                )
+
+
+class _FlakyHandler(BaseHTTPRequestHandler):
+    """ Answers with the queued statuses first, then 200; keeps connections alive """
+
+    protocol_version = "HTTP/1.1"
+    statuses = []
+    requests_seen = 0
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests_seen += 1
+        status = cls.statuses.pop(0) if cls.statuses else 200
+        body = b"ok" if status == 200 else b"unavailable"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTests(SimpleTestCase):
+    def setUp(self):
+        _FlakyHandler.statuses = []
+        _FlakyHandler.requests_seen = 0
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _FlakyHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.host = f"127.0.0.1:{server.server_port}"
+        self.client = HttpClient(max_retries=2, backoff_factor=0)
+        self.addCleanup(self.client.close)
+
+    def test_retryable_statuses_are_retried(self):
+        _FlakyHandler.statuses = [503, 429]
+        response = self.client.get(f"http://{self.host}/page")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_FlakyHandler.requests_seen, 3)
+
+        stats = self.client.host_stats()[self.host]
+        self.assertEqual((stats["requests"], stats["errors"], stats["bytes"]), (1, 0, 2))
+
+    def test_last_response_is_returned_when_retries_run_out(self):
+        _FlakyHandler.statuses = [503, 503, 503, 503]
+        response = self.client.get(f"http://{self.host}/page")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(_FlakyHandler.requests_seen, 3)
+        with self.assertRaises(requests.HTTPError):
+            response.raise_for_status()
+        self.assertEqual(self.client.host_stats()[self.host]["errors"], 1)
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            self.client.get(f"http://{self.host}/page")
+        stats = self.client.host_stats()[self.host]
+        self.assertEqual((stats["requests"], stats["connections"]), (3, 1))
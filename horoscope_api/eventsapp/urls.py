@@ -2,4 +2,8 @@ from django.urls import path
 from . import views
 urlpatterns = [
     path("events/",views.events, name="events-api"),
+    path("events/jobs/<int:job_id>/", views.crawl_job_status, name="events-job-status"),
+    path("community-events/", views.CommunityEventListAPIView.as_view(), name="community-events-list"),
+    path("community-events/nearby/", views.NearbyCommunityEventsAPIView.as_view(), name="community-events-nearby"),
+    path("community-events/<int:pk>/", views.CommunityEventDetailAPIView.as_view(), name="community-events-detail"),
 ]
@@ -1,76 +1,110 @@
-from bs4 import BeautifulSoup
 import logging
 import time
 import random
 import requests
 
+from horoscope_api.metrics import METRO_SECONDS, PARSE_FAILURES, STAGE_SECONDS
+from horoscope_api.parsing import make_soup, select, select_one
+
+from .dates import parse_event_date_range
+from .http_client import SULEKHA_HEADERS, get_http_client
+from .page_cache import fetch_parsed, get_page_cache
+from .records import EventRecord, details_error
+
 logger = logging.getLogger(__name__)
 
+SULEKHA_BASE_URL = "https://events.sulekha.com"
+
+# Seconds to wait before each listing request, to avoid rate limiting
+POLITENESS_DELAY = (1, 3)
 
-def scrape_sulekha_events(city):
+
+class ListingError(Exception):
+    """
+    A listing page that loaded but could not be parsed, e.g. a captcha or
+    block page or a redesign. It is a scrape error like a failed request, so
+    the metro's stored events are kept.
+    """
+
+
+def scrape_sulekha_events(city, client=None, memo=None):
     """
     Scrape all events from Sulekha for a given city metro area,
-    organized by section/category
-    """
-    url = f"https://events.sulekha.com/{city.lower()}"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Referer": "https://events.sulekha.com/",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-        "Cache-Control": "max-age=0",
-    }
+    organized by section/category. Pass the same DetailMemo for every metro
+    of a run to fetch each event's details only once.
+    """
+    with METRO_SECONDS.time(metro=city, stage="scrape"):
+        return _scrape_sulekha_events(city, client, memo)
+
+
+def _scrape_sulekha_events(city, client, memo):
+    client = client or get_http_client()
+    url = f"{SULEKHA_BASE_URL}/{city.lower()}"
 
     try:
         # Add a small delay to avoid rate limiting
-        time.sleep(random.uniform(1, 3))
+        time.sleep(random.uniform(*POLITENESS_DELAY))
+
+        # The listing is cached as parsed cards; detail pages are cached on their own
+        categorized_events = fetch_parsed(
+            get_page_cache(),
+            client,
+            url,
+            lambda html: parse_sulekha_listing(html, city, fetch_details=False),
+        )
 
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+    except (requests.RequestException, ListingError) as e:
+        logger.error(f"Error fetching events: {e}")
+        return {"error": str(e)}
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        categorized_events = {}
+    for section_events in categorized_events.values():
+        for event_data in section_events:
+            merge_event_details(
+                event_data, extract_event_details_inside_link(event_data.event_url, client=client, memo=memo)
+            )
 
-        # Find all regular section containers
-        section_containers = soup.select("section.container.container-max")
+    return categorized_events
 
-        for section in section_containers:
-            # Extract section title
-            title_elem = section.select_one(".title h2")
-            if not title_elem:
-                # Try alternative title selector for "Dance Events" type sections
-                title_elem = section.select_one(".discover-titlewarp .title")
 
-        # NEW: Find and scrape the "Upcoming Events" section
-        upcoming_events = scrape_upcoming_events(soup, city)
-        if upcoming_events:
-            categorized_events.update(upcoming_events)
+@STAGE_SECONDS.timed(source="sulekha", stage="parse_listing")
+def parse_sulekha_listing(html, city, fetch_details=True, client=None, base_url=None):
+    """
+    Parse a Sulekha metro listing page into events organized by section/category.
+    Relative event links are resolved against base_url (default
+    SULEKHA_BASE_URL). Raises ListingError when the page has no events section.
+    """
+    soup = make_soup(html)
+    categorized_events = {}
 
-        return categorized_events
+    # Find and scrape the "Upcoming Events" section
+    upcoming_events = scrape_upcoming_events(
+        soup, city, fetch_details=fetch_details, client=client, base_url=base_url
+    )
+    if upcoming_events:
+        categorized_events.update(upcoming_events)
 
-    except requests.RequestException as e:
-        logger.error(f"Error fetching events: {e}")
-        return {"error": str(e)}
+    return categorized_events
 
 
-def scrape_upcoming_events(soup, city):
+def scrape_upcoming_events(soup, city, fetch_details=True, client=None, base_url=None):
     """
-    Scrape the "Upcoming Events" section from the Sulekha website
+    Scrape the "Upcoming Events" section from the Sulekha website.
+    With fetch_details=False only the listing cards are parsed and the
+    event detail pages are left for the caller to fetch.
     """
-    try:
-        # Find the "Upcoming Events" section
-        upcoming_section = soup.select_one("section.global-eventwarp")
-        if not upcoming_section:
-            logger.warning(f"Could not find 'Upcoming Events' section for {city}")
-            return {}
+    # Find the "Upcoming Events" section
+    upcoming_section = select_one(soup, "section.global-eventwarp")
+    if not upcoming_section:
+        logger.warning(f"Could not find 'Upcoming Events' section for {city}")
+        PARSE_FAILURES.inc(source="sulekha", kind="listing_section")
+        raise ListingError(f"No 'Upcoming Events' section on the {city} listing")
 
+    try:
         # Extract the section title
-        title_elem = upcoming_section.select_one(".discover-titlewarp .maintitle")
+        title_elem = select_one(upcoming_section, ".discover-titlewarp .maintitle")
         if not title_elem:
             # Try alternative title selector
-            title_elem = upcoming_section.select_one(".discover-titlewarp h2.maintitle")
+            title_elem = select_one(upcoming_section, ".discover-titlewarp h2.maintitle")
 
         section_title = "Upcoming Events"
         if title_elem:
@@ -80,19 +114,20 @@ def scrape_upcoming_events(soup, city):
         upcoming_events = {section_title: []}
 
         # Find all event cards within the "Upcoming Events" section
-        event_articles = upcoming_section.select("article.global-eventlist")
+        event_articles = select(upcoming_section, "article.global-eventlist")
 
         for article in event_articles:
             try:
-                event_card_area = article.select_one("section.eventcardarea")
+                event_card_area = select_one(article, "section.eventcardarea")
                 if event_card_area:
                     event_data = extract_event_data_from_upcoming_card(
-                        event_card_area, article
+                        event_card_area, article, fetch_details=fetch_details, client=client, base_url=base_url
                     )
                     if event_data:
                         upcoming_events[section_title].append(event_data)
             except Exception as e:
                 logger.error(f"Error parsing upcoming event card: {e}")
+                PARSE_FAILURES.inc(source="sulekha", kind="card")
                 continue
 
         logger.info(
@@ -102,20 +137,22 @@ def scrape_upcoming_events(soup, city):
 
     except Exception as e:
         logger.error(f"Error scraping upcoming events: {e}")
-        return {}
+        PARSE_FAILURES.inc(source="sulekha", kind="listing")
+        raise ListingError(f"Error scraping upcoming events for {city}: {e}") from e
 
 
-def extract_event_data_from_upcoming_card(card_area, article=None):
+@STAGE_SECONDS.timed(source="sulekha", stage="extract_card")
+def extract_event_data_from_upcoming_card(card_area, article=None, fetch_details=True, client=None, base_url=None):
     """
     Extract event data from an upcoming event card area
     """
     # Extract basic info
-    title_elem = card_area.select_one(".event-info .title h3 a")
-    date_elem = card_area.select_one(".event-info .date")
-    venue_elem = card_area.select_one(".event-info .location b")
-    location_elem = card_area.select_one(".event-info .location a")
-    status_elem = card_area.select_one(".event-info .batch")
-    image_elem = card_area.select_one(".event-img figure a img")
+    title_elem = select_one(card_area, ".event-info .title h3 a")
+    date_elem = select_one(card_area, ".event-info .date")
+    venue_elem = select_one(card_area, ".event-info .location b")
+    location_elem = select_one(card_area, ".event-info .location a")
+    status_elem = select_one(card_area, ".event-info .batch")
+    image_elem = select_one(card_area, ".event-img figure a img")
 
     # Extract event ID and URL from article attributes
     event_id = None
@@ -132,9 +169,9 @@ def extract_event_data_from_upcoming_card(card_area, article=None):
 
     # Extract performers/lineup
     performers = []
-    lineup_elem = card_area.select_one(".event-info .lineup")
+    lineup_elem = select_one(card_area, ".event-info .lineup")
     if lineup_elem:
-        for artist_link in lineup_elem.select("a"):
+        for artist_link in select(lineup_elem, "a"):
             performers.append(artist_link.text.strip())
 
     # Clean and format extracted data
@@ -144,14 +181,14 @@ def extract_event_data_from_upcoming_card(card_area, article=None):
     link = "#"
     if title_elem and title_elem.has_attr("href"):
         href = title_elem["href"]
-        link = f"https://events.sulekha.com{href}" if href.startswith("/") else href
+        link = f"{base_url or SULEKHA_BASE_URL}{href}" if href.startswith("/") else href
 
     # Extract date and clean it
     date = "N/A"
     if date_elem:
         date_text = date_elem.text.strip()
         # Remove the SVG icon text if present
-        icon_elem = date_elem.select_one("i")
+        icon_elem = select_one(date_elem, "i")
         if icon_elem:
             icon_text = icon_elem.text.strip()
             date_text = date_text.replace(icon_text, "").strip()
@@ -164,18 +201,18 @@ def extract_event_data_from_upcoming_card(card_area, article=None):
 
     # Price can be in different locations depending on the card style
     price = "N/A"
-    price_elem = card_area.select_one(".actionarea .price b")
+    price_elem = select_one(card_area, ".actionarea .price b")
     if price_elem:
         price = price_elem.text.strip()
     else:
         # Try alternative price location
-        alt_price_elem = card_area.select_one(".event-info .price b")
+        alt_price_elem = select_one(card_area, ".event-info .price b")
         if alt_price_elem:
             price = alt_price_elem.text.strip()
 
     # Get action type (Buy Tickets, Register, etc.)
     action_type = "Buy Tickets"
-    action_elem = card_area.select_one(".actionarea .action a")
+    action_elem = select_one(card_area, ".actionarea .action a")
     if action_elem:
         action_text = action_elem.text.strip()
         # Clean up the text by removing whitespace and newlines
@@ -183,140 +220,160 @@ def extract_event_data_from_upcoming_card(card_area, article=None):
 
     # Extract category if available
     category = None
-    category_elem = card_area.select_one(".event-info .lineup a[href*='category']")
+    category_elem = select_one(card_area, ".event-info .lineup a[href*='category']")
     if category_elem:
         category = category_elem.text.strip()
 
-    # Get comprehensive event details including description and venue details
-    event_details_data = extract_event_details_inside_link(link)
-    
-    # Create a comprehensive event data dictionary
-    event_data = {
-        "id": event_id,
-        "title": title,
-        "link": link,
-        "date": date,
-        "venue": venue,
-        "location": location,
-        "price": f"Starts at {price}" if price != "N/A" else "N/A",
-        "status": status,
-        "category": category,
-        "performers": performers if performers else "N/A",
-        "image": image,
-        "action_type": action_type,
-        "event_url": event_url,
-    }
-    
-    # Add detailed event information if available
-    if event_details_data:
-        # Add description
-        if "description" in event_details_data:
-            event_data["description"] = event_details_data["description"]
-        
-        # Add venue details
-        if "venue_details" in event_details_data and event_details_data["venue_details"]:
-            event_data["venue_details"] = event_details_data["venue_details"]
-            
-        # Add terms and conditions
-        if "terms_and_conditions" in event_details_data and event_details_data["terms_and_conditions"]:
-            event_data["terms_and_conditions"] = event_details_data["terms_and_conditions"]
-            
-        # Add artist details
-        if "artist_details" in event_details_data and event_details_data["artist_details"]:
-            event_data["artist_details"] = event_details_data["artist_details"]
-            
-        # Add organizer details
-        if "organizer_details" in event_details_data and event_details_data["organizer_details"]:
-            event_data["organizer_details"] = event_details_data["organizer_details"]
+    # Parse the date text into local start/end (naive ISO strings)
+    start_local, end_local = parse_event_date_range(date if date != "N/A" else None)
+
+    event_data = EventRecord(
+        event_id=event_id,
+        name=title,
+        event_url=link,
+        event_date=date,
+        start_local=start_local,
+        end_local=end_local,
+        venue=venue,
+        location=location,
+        price=f"Starts at {price}" if price != "N/A" else "N/A",
+        status=status,
+        category=category,
+        performers=performers,
+        cover_image=image,
+        action_type=action_type,
+        filter_url=event_url,
+    )
+
+    if fetch_details:
+        # Get comprehensive event details including description and venue details
+        merge_event_details(event_data, extract_event_details_inside_link(link, client=client))
 
-        # Add ticket information
-        if "ticket_information" in event_details_data and event_details_data["ticket_information"]:
-            event_data["ticket_information"] = event_details_data["ticket_information"]
+    return event_data
 
 
-       
-    
-            
-    
-    return event_data
+def merge_event_details(event_data, event_details_data):
+    """
+    Merge the record parsed from an event details page into the card record
+    """
+    if event_details_data is None:
+        return event_data
+    return event_data.merge_details(event_details_data)
 
 
-def extract_event_details_inside_link(link):
+def extract_event_details_inside_link(link, client=None, memo=None):
     """
     Extract comprehensive event details including description, venue information, and terms & conditions
     """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Referer": "https://events.sulekha.com/",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-        "Cache-Control": "max-age=0",
-    }
-
+    client = client or get_http_client()
+    fetch = lambda url: fetch_parsed(get_page_cache(), client, url, parse_event_details)
     try:
-        response = requests.get(link, headers=headers, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        event_details = {}
-        
-        # Extract event description
-        description_section = soup.select_one("section.ACTION-sec-eventdetails")
-        if description_section:
-            event_details["description"] = extract_formatted_paragraphs(description_section)
-        
-        # Extract venue details
-        venue_details = extract_venue_details(soup)
-        if venue_details:
-            event_details["venue_details"] = venue_details
-        
-        # Extract terms and conditions
-        terms_conditions = extract_terms_and_conditions(soup)
-        if terms_conditions:
-            event_details["terms_and_conditions"] = terms_conditions
-
-        # Extract artist details
-        artist_details = extract_artist_details(soup)
-        if artist_details:
-            event_details["artist_details"] = artist_details
-        
-        # Extract organizer details
-        organizer_details = extract_organizer_details(soup)
-        if organizer_details:
-            event_details["organizer_details"] = organizer_details
-            
+        return memo.get(link, fetch) if memo is not None else fetch(link)
 
-        # Extract ticket information
-        ticket_info = extract_ticket_information(soup)
-        if ticket_info:
-            event_details["ticket_information"] = ticket_info
+    except Exception as e:
+        logger.error(f"Error fetching event details: {e}")
+        if not isinstance(e, requests.RequestException):
+            PARSE_FAILURES.inc(source="sulekha", kind="details")
+        return details_error()
 
 
-        
+@STAGE_SECONDS.timed(source="sulekha", stage="parse_details")
+def parse_event_details(html):
+    """
+    Parse an event details page into an EventRecord holding its detail fields
+    """
+    return event_details_record(parse_event_sections(html))
 
-            
-        # Extract other sections if needed (organizer info, etc.)
-        # Add more sections here as needed
-        
-        return event_details
-        
-    except Exception as e:
-        logger.error(f"Error fetching event details: {e}")
-        return {"description": "Error fetching details", "venue_details": None, "terms_and_conditions": None}
+
+def event_details_record(event_details):
+    """
+    EventRecord of the sections parse_event_sections() found; a missing
+    section or value leaves its fields empty
+    """
+    venue_details = event_details.get("venue_details") or {}
+    terms_data = event_details.get("terms_and_conditions") or {}
+    artist_details = event_details.get("artist_details") or {}
+    organizer_details = event_details.get("organizer_details") or {}
+    ticket_info = event_details.get("ticket_information") or {}
+
+    return EventRecord(
+        description=event_details.get("description", ""),
+        venue_name=venue_details.get("name", ""),
+        venue_full_address=venue_details.get("full_address", ""),
+        venue_street=venue_details.get("street_address", ""),
+        venue_city=venue_details.get("city", ""),
+        venue_state=venue_details.get("state", ""),
+        venue_zip=venue_details.get("zip_code", ""),
+        terms_title=terms_data.get("title", ""),
+        terms_location=terms_data.get("location_id", ""),
+        terms_list=terms_data.get("terms"),
+        artist_name=artist_details.get("name", ""),
+        artist_image=artist_details.get("image", ""),
+        artist_description=artist_details.get("description", ""),
+        artist_link=artist_details.get("link", ""),
+        organizer_name=organizer_details.get("name", ""),
+        organizer_logo=organizer_details.get("logo", ""),
+        organizer_events_link=organizer_details.get("events_link", ""),
+        organizer_upcoming_count=organizer_details.get("upcoming_events_count", ""),
+        organizer_follow_available=organizer_details.get("follow_link_available", False),
+        ticket_types=ticket_info.get("ticket_types"),
+        ticket_action_button=(ticket_info.get("action_button") or {}).get("text", ""),
+    )
+
+
+def parse_event_sections(html):
+    """
+    Parse every supported section out of an event details page, as nested
+    dicts
+    """
+    soup = make_soup(html)
+
+    event_details = {}
+
+    # Extract event description
+    description_section = select_one(soup, "section.ACTION-sec-eventdetails")
+    if description_section:
+        event_details["description"] = extract_formatted_paragraphs(description_section)
+
+    # Extract venue details
+    venue_details = extract_venue_details(soup)
+    if venue_details:
+        event_details["venue_details"] = venue_details
+
+    # Extract terms and conditions
+    terms_conditions = extract_terms_and_conditions(soup)
+    if terms_conditions:
+        event_details["terms_and_conditions"] = terms_conditions
+
+    # Extract artist details
+    artist_details = extract_artist_details(soup)
+    if artist_details:
+        event_details["artist_details"] = artist_details
+
+    # Extract organizer details
+    organizer_details = extract_organizer_details(soup)
+    if organizer_details:
+        event_details["organizer_details"] = organizer_details
+
+    # Extract ticket information
+    ticket_info = extract_ticket_information(soup)
+    if ticket_info:
+        event_details["ticket_information"] = ticket_info
+
+    return event_details
 
 
+@STAGE_SECONDS.timed(source="sulekha", stage="extract_venue_details")
 def extract_venue_details(soup):
     """
     Extract complete venue details from the event details page including all navigation options
     """
-    venue_section = soup.select_one("section.eventdetailrow.ACTION-sec-venuedetails")
+    venue_section = select_one(soup, "section.eventdetailrow.ACTION-sec-venuedetails")
     if not venue_section:
         return None
 
     # Get venue name and address
-    venue_info = venue_section.select_one("small")
+    venue_info = select_one(venue_section, "small")
     if not venue_info:
         return None
     
@@ -324,7 +381,7 @@ def extract_venue_details(soup):
     venue_text = venue_info.get_text(separator=" ", strip=True)
     
     # Try to get the venue name (within <b> tags)
-    venue_name_elem = venue_info.select_one("b")
+    venue_name_elem = select_one(venue_info, "b")
     venue_name = venue_name_elem.text.strip() if venue_name_elem else "N/A"
     
     # Get address (everything after the venue name)
@@ -334,13 +391,13 @@ def extract_venue_details(soup):
     nav_links = {}
     
     # Find the navigation links container
-    nav_container = venue_section.select_one("div.iconav")
+    nav_container = select_one(venue_section, "div.iconav")
     if nav_container:
         # Extract each navigation option by icon type
-        nav_items = nav_container.select("li a")
+        nav_items = select(nav_container, "li a")
         for nav_item in nav_items:
             # Look for icon classes to determine type
-            icon = nav_item.select_one("i")
+            icon = select_one(nav_item, "i")
             if icon:
                 nav_type = None
                 if icon.has_attr("class"):
@@ -358,7 +415,7 @@ def extract_venue_details(soup):
                     nav_links[nav_type] = nav_item["href"]
     
     # Extract map image if available
-    map_img = venue_section.select_one("img")
+    map_img = select_one(venue_section, "img")
     map_url = map_img["src"] if map_img and map_img.has_attr("src") else None
     map_title = map_img["title"] if map_img and map_img.has_attr("title") else None
     
@@ -400,20 +457,21 @@ def extract_venue_details(soup):
     }
 
 
+@STAGE_SECONDS.timed(source="sulekha", stage="extract_terms_and_conditions")
 def extract_terms_and_conditions(soup):
     """
     Extract only the visible Terms & Conditions information from the event details page
     """
-    terms_section = soup.select_one("section.eventdetailrow.ACTION-sec-condition")
+    terms_section = select_one(soup, "section.eventdetailrow.ACTION-sec-condition")
     if not terms_section:
         return None
     
     # Extract the section title
-    title_elem = terms_section.select_one(".evesubtitle")
+    title_elem = select_one(terms_section, ".evesubtitle")
     section_title = title_elem.text.strip() if title_elem else "Terms & Conditions"
     
     # Get the article container
-    article = terms_section.select_one("article")
+    article = select_one(terms_section, "article")
     if not article:
         return {
             "title": section_title,
@@ -424,7 +482,7 @@ def extract_terms_and_conditions(soup):
     terms = []
     
     # Process all paragraphs, skipping those with the "hide" class
-    for p in article.select("p"):
+    for p in select(article, "p"):
         # Skip hidden terms
         if p.has_attr("class") and "hide" in p["class"]:
             continue
@@ -442,6 +500,7 @@ def extract_terms_and_conditions(soup):
         "terms": terms
     }
 
+@STAGE_SECONDS.timed(source="sulekha", stage="extract_formatted_paragraphs")
 def extract_formatted_paragraphs(section):
     """
     Extract formatted paragraphs from event description section
@@ -449,12 +508,12 @@ def extract_formatted_paragraphs(section):
     if not section:
         return "N/A"
         
-    p_tags = section.select("p.MsoNormal")
+    p_tags = select(section, "p.MsoNormal")
     cleaned_texts = []
 
     # If no MsoNormal paragraphs found, try regular paragraphs
     if not p_tags:
-        p_tags = section.select("p")
+        p_tags = select(section, "p")
 
     for p in p_tags:
         # Get text and normalize internal line breaks
@@ -467,28 +526,29 @@ def extract_formatted_paragraphs(section):
     return final_output if final_output else "N/A"
 
 
+@STAGE_SECONDS.timed(source="sulekha", stage="extract_artist_details")
 def extract_artist_details(soup):
     """
     Extract artist details from the event details page sidebar
     """
-    artist_article = soup.select_one("aside article.rhsbg div.atistdetailswrp")
+    artist_article = select_one(soup, "aside article.rhsbg div.atistdetailswrp")
     if not artist_article:
         return None
     
     artist_details = {}
     
     # Extract from artist details section
-    artist_item = artist_article.select_one("ul li div.artistbg")
+    artist_item = select_one(artist_article, "ul li div.artistbg")
     if artist_item:
         # Extract artist image
-        img_elem = artist_item.select_one("figure img")
+        img_elem = select_one(artist_item, "figure img")
         if img_elem:
             artist_details["image"] = img_elem.get("src", "")
             if img_elem.has_attr("alt"):
                 artist_details["image_alt"] = img_elem.get("alt", "")
         
         # Extract artist name and link
-        name_elem = artist_item.select_one("h3 a")
+        name_elem = select_one(artist_item, "h3 a")
         if name_elem:
             artist_details["name"] = name_elem.text.strip()
             if name_elem.has_attr("href"):
@@ -497,66 +557,66 @@ def extract_artist_details(soup):
                 artist_details["link_title"] = name_elem.get("title", "")
         
         # Extract artist description
-        description_elem = artist_item.select_one("p")
+        description_elem = select_one(artist_item, "p")
         if description_elem:
             # Get the text but exclude the "More »" link text
-            more_link = description_elem.select_one("a")
+            more_link = select_one(description_elem, "a")
             if more_link:
                 more_link.extract()  # Remove the link from the paragraph
             
             artist_details["description"] = description_elem.text.strip()
             
             # Add the "more" link separately if needed
-            more_link = artist_item.select_one("p a")
+            more_link = select_one(artist_item, "p a")
             if more_link and more_link.has_attr("href"):
                 artist_details["more_link"] = more_link.get("href", "")
     
     # Extract tour information if available
-    tour_article = soup.select_one("div#div_artistcurrent article")
+    tour_article = select_one(soup, "div#div_artistcurrent article")
     if tour_article:
-        tour_title_elem = tour_article.select_one("div.rhstitle span")
+        tour_title_elem = select_one(tour_article, "div.rhstitle span")
         if tour_title_elem:
             artist_details["tour_title"] = tour_title_elem.text.strip()
         
         # Extract upcoming shows
         upcoming_shows = []
-        show_items = tour_article.select("div.atistdetailswrp ul li div.atistdetails")
+        show_items = select(tour_article, "div.atistdetailswrp ul li div.atistdetails")
         
         for show in show_items:
             show_info = {}
             
             # Extract date
-            date_elem = show.select_one("div.datewrp")
+            date_elem = select_one(show, "div.datewrp")
             if date_elem:
-                day_elem = date_elem.select_one("span.day")
-                month_elem = date_elem.select_one("span.month")
+                day_elem = select_one(date_elem, "span.day")
+                month_elem = select_one(date_elem, "span.month")
                 
                 if day_elem and month_elem:
                     show_info["day"] = day_elem.text.strip()
                     show_info["month"] = month_elem.text.strip()
             
             # Extract location details
-            location_info = show.select_one("div.dateloc ul.whnwre")
+            location_info = select_one(show, "div.dateloc ul.whnwre")
             if location_info:
                 # City/state
-                city_elem = location_info.select_one("li h3.h3 a")
+                city_elem = select_one(location_info, "li h3.h3 a")
                 if city_elem:
                     show_info["title"] = city_elem.get("title", "") if city_elem.has_attr("title") else ""
                     show_info["location_link"] = city_elem.get("href", "") if city_elem.has_attr("href") else ""
                     show_info["city"] = city_elem.text.strip()
                 
                 # Time information
-                time_elem = location_info.select_one("li.times")
+                time_elem = select_one(location_info, "li.times")
                 if time_elem:
                     show_info["time"] = time_elem.text.strip().replace("\xa0", " ")
                 
                 # Venue information
-                venue_elem = location_info.select_one("li.venuename")
+                venue_elem = select_one(location_info, "li.venuename")
                 if venue_elem:
                     venue_text = venue_elem.text.strip().replace("\xa0", " ")
                     
                     # Try to extract venue name and address
-                    venue_link = venue_elem.select_one("a")
+                    venue_link = select_one(venue_elem, "a")
                     if venue_link:
                         show_info["venue_name"] = venue_link.text.strip()
                         show_info["venue_link"] = venue_link.get("href", "") if venue_link.has_attr("href") else ""
@@ -578,19 +638,20 @@ def extract_artist_details(soup):
     return artist_details
 
 
+@STAGE_SECONDS.timed(source="sulekha", stage="extract_organizer_details")
 def extract_organizer_details(soup):
     """
     Extract organizer details from the event details page
     """
     # Fix the CSS selector for compatibility
     # Using a more general selector that doesn't rely on :contains
-    organizer_section = soup.select_one("section.eventdetailrow h2.evesubtitle")
+    organizer_section = select_one(soup, "section.eventdetailrow h2.evesubtitle")
     if organizer_section and "Organizer Details" in organizer_section.text:
         organizer_section = organizer_section.parent  # Get the parent section
     else:
         # Try alternative approach to find the organizer section
-        for section in soup.select("section.eventdetailrow"):
-            title = section.select_one("h2.evesubtitle")
+        for section in select(soup, "section.eventdetailrow"):
+            title = select_one(section, "h2.evesubtitle")
             if title and "Organizer Details" in title.text:
                 organizer_section = section
                 break
@@ -600,30 +661,30 @@ def extract_organizer_details(soup):
     organizer_details = {}
     
     # Extract section title
-    title_elem = organizer_section.select_one("h2.evesubtitle")
+    title_elem = select_one(organizer_section, "h2.evesubtitle")
     if title_elem:
         organizer_details["title"] = title_elem.text.strip()
     
     # Extract organizer information
-    org_article = organizer_section.select_one("article.orgwrap")
+    org_article = select_one(organizer_section, "article.orgwrap")
     if org_article:
         # Extract organizer logo
-        logo_elem = org_article.select_one("div.orglogo figure img")
+        logo_elem = select_one(org_article, "div.orglogo figure img")
         if logo_elem:
             organizer_details["logo"] = logo_elem.get("src", "") if logo_elem.has_attr("src") else ""
             if logo_elem.has_attr("title"):
                 organizer_details["logo_title"] = logo_elem.get("title", "")
         
         # Extract organizer name and event count
-        org_details_div = org_article.select_one("div.org-detals")
+        org_details_div = select_one(org_article, "div.org-detals")
         if org_details_div:
             # Organizer name
-            name_elem = org_details_div.select_one("b")
+            name_elem = select_one(org_details_div, "b")
             if name_elem:
                 organizer_details["name"] = name_elem.text.strip()
             
             # Upcoming events count
-            events_link = org_details_div.select_one("a.upcmtext")
+            events_link = select_one(org_details_div, "a.upcmtext")
             if events_link:
                 organizer_details["events_link"] = events_link.get("href", "") if events_link.has_attr("href") else ""
                 if events_link.has_attr("title"):
@@ -637,44 +698,44 @@ def extract_organizer_details(soup):
                     organizer_details["upcoming_events_count"] = events_count_match.group(1)
         
         # Extract action links
-        action_div = org_article.select_one("div.org-action")
+        action_div = select_one(org_article, "div.org-action")
         if action_div:
             # Profile link
-            profile_link = action_div.select_one("a[title*='Profile']")
+            profile_link = select_one(action_div, "a[title*='Profile']")
             if profile_link:
                 organizer_details["profile_link"] = profile_link.get("href", "") if profile_link.has_attr("href") else ""
             
             # Follow/Following links (these are usually JavaScript actions)
-            follow_link = action_div.select_one("a.btn-follow605")
+            follow_link = select_one(action_div, "a.btn-follow605")
             if follow_link:
                 organizer_details["follow_link_available"] = True
     
     # Extract events by this organizer
-    org_events_div = soup.select_one("div#div_orgmasterevents article")
+    org_events_div = select_one(soup, "div#div_orgmasterevents article")
     if org_events_div:
         events_list = []
         
         # Get all event items
-        event_items = org_events_div.select("div.orgartistinfo ul li")
+        event_items = select(org_events_div, "div.orgartistinfo ul li")
         
         for event in event_items:
             event_info = {}
             
             # Artist name
-            artist_name_elem = event.select_one("h3.artistname a")
+            artist_name_elem = select_one(event, "h3.artistname a")
             if artist_name_elem:
                 event_info["artist_name"] = artist_name_elem.text.strip()
                 event_info["artist_link"] = artist_name_elem.get("href", "") if artist_name_elem.has_attr("href") else ""
             
             # Event image
-            img_elem = event.select_one("figure img")
+            img_elem = select_one(event, "figure img")
             if img_elem:
                 event_info["image"] = img_elem.get("src", "") if img_elem.has_attr("src") else ""
                 if img_elem.has_attr("title"):
                     event_info["image_title"] = img_elem.get("title", "")
             
             # Event title
-            title_elem = event.select_one("small a")
+            title_elem = select_one(event, "small a")
             if title_elem:
                 event_info["title"] = title_elem.text.strip()
                 event_info["link"] = title_elem.get("href", "") if title_elem.has_attr("href") else ""
@@ -682,17 +743,17 @@ def extract_organizer_details(soup):
                     event_info["link_title"] = title_elem.get("title", "")
             
             # Event time/date
-            time_elem = event.select_one("span.timezone")
+            time_elem = select_one(event, "span.timezone")
             if time_elem:
                 event_info["time"] = time_elem.text.strip().replace("\xa0", " ")
             
             # Venue
-            venue_elem = event.select_one("p")
+            venue_elem = select_one(event, "p")
             if venue_elem:
                 event_info["venue"] = venue_elem.text.strip().replace("\xa0", " ")
             
             # Ticket link
-            ticket_link = event.select_one("a.btn-ghost-red1")
+            ticket_link = select_one(event, "a.btn-ghost-red1")
             if ticket_link:
                 event_info["ticket_link"] = ticket_link.get("href", "") if ticket_link.has_attr("href") else ""
                 if ticket_link.has_attr("title"):
@@ -707,49 +768,50 @@ def extract_organizer_details(soup):
     return organizer_details
 
 
+@STAGE_SECONDS.timed(source="sulekha", stage="extract_ticket_information")
 def extract_ticket_information(soup):
     """
     Extract ticket information including prices, categories, and availability
     """
-    ticket_section = soup.select_one("section.tkt-wraper.ACTION-sec-ticket")
+    ticket_section = select_one(soup, "section.tkt-wraper.ACTION-sec-ticket")
     if not ticket_section:
         return None
     
     ticket_info = {}
     
     # Extract section title
-    title_elem = ticket_section.select_one("h2")
+    title_elem = select_one(ticket_section, "h2")
     if title_elem:
         # Get the text but exclude the button text
-        button = title_elem.select_one("a")
+        button = select_one(title_elem, "a")
         if button:
             button.extract()  # Remove the button from the title
         ticket_info["title"] = title_elem.text.strip()
     
     # Extract all ticket types
     ticket_types = []
-    ticket_articles = ticket_section.select("article.tkt-wrap")
+    ticket_articles = select(ticket_section, "article.tkt-wrap")
     
     for article in ticket_articles:
         ticket_type = {}
         
         # Extract ticket category/title
-        category_elem = article.select_one("b.tkt-title")
+        category_elem = select_one(article, "b.tkt-title")
         if category_elem:
             ticket_type["category"] = category_elem.text.strip()
         
         # Extract ticket description
-        desc_elem = article.select_one("small.tkt-desc")
+        desc_elem = select_one(article, "small.tkt-desc")
         if desc_elem and desc_elem.text.strip():
             ticket_type["description"] = desc_elem.text.strip()
         
         # Extract ticket price
-        price_elem = article.select_one("small.tkt-price-wrp")
+        price_elem = select_one(article, "small.tkt-price-wrp")
         if price_elem:
             ticket_type["price"] = price_elem.text.strip()
         
         # Extract ticket status
-        status_elem = article.select_one("span.tkt-status")
+        status_elem = select_one(article, "span.tkt-status")
         if status_elem:
             ticket_type["status"] = status_elem.text.strip()
             # Check if it's almost sold out (has red class)
@@ -757,12 +819,12 @@ def extract_ticket_information(soup):
                 ticket_type["almost_sold_out"] = True
         
         # Extract ticket closing date
-        closing_date_elem = article.select_one("div.tktopnstatus b")
+        closing_date_elem = select_one(article, "div.tktopnstatus b")
         if closing_date_elem:
             ticket_type["closing_date"] = closing_date_elem.text.strip()
         
         # Extract any other available information
-        closing_text_elem = article.select_one("div.tktopnstatus span")
+        closing_text_elem = select_one(article, "div.tktopnstatus span")
         if closing_text_elem:
             ticket_type["closing_text"] = closing_text_elem.text.strip()
         
@@ -774,7 +836,7 @@ def extract_ticket_information(soup):
         ticket_info["ticket_types"] = ticket_types
     
     # Extract action button if available
-    action_btn = ticket_section.select_one("article.tkt-totalbg a.buy-btn")
+    action_btn = select_one(ticket_section, "article.tkt-totalbg a.buy-btn")
     if action_btn:
         ticket_info["action_button"] = {
             "text": action_btn.text.strip(),
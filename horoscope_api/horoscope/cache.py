@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .session import run_async, run_sync, submit
+from .store import safe_load_day, save_day_in_background
+from .utils import SIGNS, scrape_horoscope, scrape_sign
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE = 60 * 60
+DEFAULT_REFRESH_INTERVAL = 60 * 60
+
+HIT = "HIT"
+STALE = "STALE"
+MISS = "MISS"
+
+
+class HoroscopeCache:
+    """
+    In-memory horoscope cache keyed by (sign, date).
+
+    A task on the scraper loop (see session.py) pre-warms the cache and then
+    refreshes all signs every `refresh_interval` seconds. Requests are served
+    from memory; once the cached day is older than `max_age` (or the date
+    rolled over) the old data is still served, marked STALE, while a
+    background refresh runs. Only a cold cache makes the caller wait for a
+    scrape. get_all() is for sync callers, aget_all() for async views.
+
+    Single signs (aget_sign) are served from the same entries; a sign that is
+    not cached yet is fetched on its own without scraping the other eleven.
+
+    Every successfully scraped sign is written to the horoscopes table once
+    per day, and a cold cache (e.g. after a restart) is filled from the table
+    before falling back to a scrape.
+    """
+
+    def __init__(self, max_age=DEFAULT_MAX_AGE, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self._entries = {}  # (sign, date) -> sign result
+        self._signs = {}  # date -> signs in page order
+        self._fetched_at = {}  # date -> epoch seconds
+        self._entry_fetched_at = {}  # (sign, date) -> epoch seconds
+        self._lock = threading.Lock()
+        self._persisted = set()  # (sign, date) already written to the table
+        self._inflight = None  # refresh task on the scraper loop
+        self._refresher = None
+
+    def _latest_date(self):
+        return max(self._signs) if self._signs else None
+
+    def _lookup(self, day):
+        """ (results, status, age) from memory, or None on a cold cache """
+        with self._lock:
+            cached_day = day if day in self._signs else self._latest_date()
+            if cached_day is None:
+                return None
+            results = [self._entries[(sign, cached_day)] for sign in self._signs[cached_day]]
+            age = time.time() - self._fetched_at[cached_day]
+
+        if cached_day != day or age > self.max_age:
+            self.refresh_in_background()
+            return results, STALE, age
+        return results, HIT, age
+
+    def _after_miss(self, day):
+        with self._lock:
+            if day not in self._signs:
+                return {"error": "Failed to fetch main horoscope page"}, MISS, 0
+            return [self._entries[(sign, day)] for sign in self._signs[day]], MISS, 0
+
+    def get_all(self, day=None):
+        """
+        Return (results, status, age_seconds) for every sign of `day`
+        (today by default). status is HIT, STALE or MISS.
+        """
+        day = day or timezone.localdate()
+        self.start_refresher()
+
+        cached = self._lookup(day)
+        if cached is not None:
+            return cached
+        if self._load_stored(day, safe_load_day(day)):
+            return self._lookup(day)
+        self.refresh()
+        return self._after_miss(day)
+
+    async def aget_all(self, day=None):
+        """ get_all() for async views; a cold cache awaits the scrape without blocking the loop """
+        day = day or timezone.localdate()
+        self.start_refresher()
+
+        cached = self._lookup(day)
+        if cached is not None:
+            return cached
+        if self._load_stored(day, await sync_to_async(safe_load_day)(day)):
+            return self._lookup(day)
+        await self.arefresh()
+        return self._after_miss(day)
+
+    def _load_stored(self, day, results):
+        """ Fill memory from a complete stored day; partial days are scraped again """
+        if len(results) < len(SIGNS):
+            return False
+        self._persisted.update((result["sign"].lower(), day) for result in results)
+        return self.store(results, day)
+
+    def _lookup_sign(self, sign, day):
+        with self._lock:
+            days = sorted((d for s, d in self._entries if s == sign), reverse=True)
+            if not days:
+                return None
+            cached_day = day if day in days else days[0]
+            result = self._entries[(sign, cached_day)]
+            age = time.time() - self._entry_fetched_at[(sign, cached_day)]
+
+        if cached_day != day or age > self.max_age:
+            submit(self._refresh_sign(sign))
+            return result, STALE, age
+        return result, HIT, age
+
+    async def aget_sign(self, sign, day=None):
+        """ Return (result, status, age_seconds) for one sign, e.g. "Aries" """
+        day = day or timezone.localdate()
+
+        cached = self._lookup_sign(sign, day)
+        if cached is not None:
+            return cached
+
+        stored = await sync_to_async(safe_load_day)(day, [sign])
+        if stored:
+            with self._lock:
+                self._entries[(sign, day)] = stored[0]
+                self._entry_fetched_at[(sign, day)] = time.time()
+            self._persisted.add((sign.lower(), day))
+            return stored[0], HIT, 0
+        return await run_async(self._refresh_sign(sign)), MISS, 0
+
+    async def _refresh_sign(self, sign):
+        day = timezone.localdate()
+        result = await scrape_sign(sign)
+        if "horoscope" in result:
+            with self._lock:
+                self._entries[(sign, day)] = result
+                self._entry_fetched_at[(sign, day)] = time.time()
+            await self._persist([result], day)
+        return result
+
+    async def _persist(self, results, day):
+        """ Write signs not yet stored for `day`; runs on the scraper loop """
+        pending = [
+            result for result in results
+            if result.get("horoscope") and (result["sign"].lower(), day) not in self._persisted
+        ]
+        if not pending:
+            return
+        signs = await sync_to_async(save_day_in_background)(pending, day)
+        self._persisted.update((sign, day) for sign in signs)
+
+    def store(self, results, day=None):
+        """ Cache a scrape_horoscope() result for `day` """
+        if not isinstance(results, list):
+            return False
+
+        day = day or timezone.localdate()
+        with self._lock:
+            self._signs[day] = [result["sign"] for result in results]
+            now = time.time()
+            for result in results:
+                self._entries[(result["sign"], day)] = result
+                self._entry_fetched_at[(result["sign"], day)] = now
+            self._fetched_at[day] = now
+
+            # Only the two most recent days are worth keeping in memory
+            days = sorted({d for _, d in self._entries} | set(self._signs))
+            for old_day in days[:-2]:
+                self._signs.pop(old_day, None)
+                self._fetched_at.pop(old_day, None)
+            for key in [key for key in self._entries if key[1] in days[:-2]]:
+                self._entries.pop(key)
+                self._entry_fetched_at.pop(key)
+            self._persisted = {key for key in self._persisted if key[1] not in days[:-2]}
+        return True
+
+    async def _refresh(self):
+        day = timezone.localdate()
+        try:
+            results = await scrape_horoscope()
+            if not self.store(results, day):
+                logger.error(f"Horoscope refresh failed: {results}")
+                return
+            await self._persist(results, day)
+        except Exception:
+            logger.exception("Horoscope refresh failed")
+
+    async def _refresh_once(self):
+        """ Runs on the scraper loop; concurrent callers share one scrape """
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._refresh())
+        await asyncio.shield(self._inflight)
+
+    def refresh(self):
+        """ Scrape all signs and store them, blocking until done """
+        run_sync(self._refresh_once())
+
+    async def arefresh(self):
+        await run_async(self._refresh_once())
+
+    def refresh_in_background(self):
+        if self._inflight is not None and not self._inflight.done():
+            return
+        submit(self._refresh_once())
+
+    def start_refresher(self):
+        """ Start the periodic refresh task once per process """
+        if self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = submit(self._refresh_forever())
+
+    async def _refresh_forever(self):
+        while True:
+            await self._refresh_once()
+            await asyncio.sleep(self.refresh_interval)
+
+horoscope_cache = HoroscopeCache(
+    max_age=getattr(settings, "HOROSCOPE_CACHE_MAX_AGE", DEFAULT_MAX_AGE),
+    refresh_interval=getattr(settings, "HOROSCOPE_REFRESH_INTERVAL", DEFAULT_REFRESH_INTERVAL),
+)
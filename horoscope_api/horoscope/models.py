@@ -1,3 +1,26 @@
 from django.db import models
+from django.utils import timezone
 
 
+class Horoscope(models.Model):
+    """
+    One category paragraph of a sign's daily horoscope. A day's reading is
+    every row for (sign, date); rows are written once per day and kept as
+    history.
+    """
+
+    sign = models.CharField(max_length=20)  # lowercase slug, e.g. "aries"
+    date = models.DateField()
+    category = models.CharField(max_length=100)
+    text = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        managed = False
+        db_table = 'horoscopes'
+        constraints = [
+            models.UniqueConstraint(fields=["sign", "date", "category"], name="horoscopes_sign_date_category_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["date", "sign"], name="horoscopes_date_sign_idx"),
+        ]
@@ -0,0 +1,89 @@
+"""
+Process-wide aiohttp session for the horoscope scraper.
+
+All scraping runs on one long-lived event loop in a daemon thread, which owns
+a single pooled ClientSession. Async views and sync callers (the refresher,
+management commands, WSGI workers) hand coroutines to that loop instead of
+creating a new loop and session per request, so every caller shares the same
+keep-alive connections to astroved.com.
+"""
+
+import asyncio
+import atexit
+import threading
+
+import aiohttp
+
+POOL_SIZE = 20
+POOL_SIZE_PER_HOST = 10
+KEEPALIVE_TIMEOUT = 60
+REQUEST_TIMEOUT = 20
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+}
+
+_loop = None
+_session = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """ The scraper event loop, started on first use """
+    global _loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="horoscope-io", daemon=True).start()
+            _loop = loop
+        return _loop
+
+
+def get_session():
+    """ The shared ClientSession; only usable from coroutines on the scraper loop """
+    global _session
+    if asyncio.get_running_loop() is not _loop:
+        raise RuntimeError("The horoscope session is bound to the scraper loop; use run_async/run_sync")
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=POOL_SIZE,
+                limit_per_host=POOL_SIZE_PER_HOST,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            headers=HEADERS,
+        )
+    return _session
+
+
+def submit(coro):
+    """ Schedule a coroutine on the scraper loop; returns a concurrent Future """
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+async def run_async(coro):
+    """ Await a coroutine on the scraper loop from any event loop """
+    loop = get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def run_sync(coro, timeout=None):
+    """ Run a coroutine on the scraper loop and block for its result """
+    return submit(coro).result(timeout)
+
+
+async def _close_session():
+    if _session is not None and not _session.closed:
+        await _session.close()
+
+
+@atexit.register
+def _shutdown():
+    if _loop is not None and _loop.is_running():
+        try:
+            run_sync(_close_session(), timeout=5)
+        except Exception:
+            pass
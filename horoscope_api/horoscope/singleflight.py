@@ -0,0 +1,35 @@
+import asyncio
+import weakref
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent coroutine calls by key.
+
+    The first caller for a key starts the work; everyone else arriving while
+    it is in flight awaits the same future and gets the same result (or
+    exception). The key is forgotten as soon as the call finishes, so later
+    callers fetch fresh data. In-flight calls are tracked per event loop since
+    futures cannot be shared across loops.
+    """
+
+    def __init__(self):
+        self._calls = weakref.WeakKeyDictionary()  # loop -> {key: future}
+        self.stats = {"started": 0, "shared": 0}
+
+    def in_flight(self, key):
+        calls = self._calls.get(asyncio.get_running_loop(), {})
+        return key in calls
+
+    async def do(self, key, fn, *args, **kwargs):
+        calls = self._calls.setdefault(asyncio.get_running_loop(), {})
+        future = calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn(*args, **kwargs))
+            calls[key] = future
+            future.add_done_callback(lambda done: calls.pop(key, None) if calls.get(key) is done else None)
+            self.stats["started"] += 1
+        else:
+            self.stats["shared"] += 1
+        # shield: a cancelled waiter must not cancel the fetch the others share
+        return await asyncio.shield(future)
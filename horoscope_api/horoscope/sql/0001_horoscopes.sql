@@ -0,0 +1,17 @@
+-- horoscopes is unmanaged (Meta.managed = False) and migrations are disabled
+-- for this project, so the table is created by hand. See horoscope.models.Horoscope.
+CREATE TABLE IF NOT EXISTS horoscopes (
+    id bigserial PRIMARY KEY,
+    sign varchar(20) NOT NULL,
+    date date NOT NULL,
+    category varchar(100) NOT NULL,
+    text text NOT NULL,
+    created_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+-- One paragraph per category of a sign's day; its leading (sign, date)
+-- columns also serve single-sign lookups
+CREATE UNIQUE INDEX IF NOT EXISTS horoscopes_sign_date_category_uniq ON horoscopes (sign, date, category);
+
+-- All signs of one day
+CREATE INDEX IF NOT EXISTS horoscopes_date_sign_idx ON horoscopes (date, sign);
@@ -0,0 +1,83 @@
+import logging
+
+from django.db import DatabaseError, close_old_connections
+
+from .models import Horoscope
+from .utils import SIGNS
+
+logger = logging.getLogger(__name__)
+
+
+def save_day(results, day):
+    """
+    Bulk-write the scraped signs of `day` (scrape_horoscope() results or a
+    single sign result). Signs that failed to scrape are skipped so a later
+    refresh can still fill them in. Returns the signs written.
+    """
+    if isinstance(results, dict):
+        results = [results]
+
+    rows = []
+    signs = []
+    for result in results:
+        if not result.get("horoscope"):
+            continue
+        sign = result["sign"].lower()
+        signs.append(sign)
+        rows.extend(
+            Horoscope(sign=sign, date=day, category=category, text=text)
+            for category, text in result["horoscope"].items()
+        )
+
+    if rows:
+        Horoscope.objects.bulk_create(rows, ignore_conflicts=True)
+    return signs
+
+
+def load_day(day, signs=None):
+    """
+    Stored readings of `day` in the shape scrape_horoscope() returns, signs in
+    zodiac order and categories in page order
+    """
+    queryset = Horoscope.objects.filter(date=day).only("sign", "category", "text").order_by("id")
+    if signs is not None:
+        queryset = queryset.filter(sign__in=[sign.lower() for sign in signs])
+
+    readings = {}
+    for row in queryset:
+        readings.setdefault(row.sign, {})[row.category] = row.text
+
+    return [
+        {"sign": sign.capitalize(), "horoscope": readings[sign]}
+        for sign in sorted(readings, key=lambda sign: SIGNS.index(sign) if sign in SIGNS else len(SIGNS))
+    ]
+
+
+def safe_save_day(results, day):
+    try:
+        return save_day(results, day)
+    except DatabaseError:
+        logger.exception(f"Could not store horoscopes for {day}")
+        return []
+
+
+def save_day_in_background(results, day):
+    """
+    safe_save_day() for the horoscope cache's persistence, which runs in a
+    worker thread outside any request cycle, so Django never recycles its
+    connection. A connection that broke or outlived CONN_MAX_AGE is replaced
+    before the save and closed after it.
+    """
+    close_old_connections()
+    try:
+        return safe_save_day(results, day)
+    finally:
+        close_old_connections()
+
+
+def safe_load_day(day, signs=None):
+    try:
+        return load_day(day, signs)
+    except DatabaseError:
+        logger.exception(f"Could not load stored horoscopes for {day}")
+        return []
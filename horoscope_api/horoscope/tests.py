@@ -1,3 +1,274 @@
-from django.test import TestCase
+import asyncio
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .cache import HIT, MISS, STALE, HoroscopeCache
+from .models import Horoscope
+from .singleflight import SingleFlight
+from .store import load_day, save_day, save_day_in_background
+from .utils import SIGNS, parse_horoscope_details, parse_horoscope_links
+
+TESTDATA = Path(__file__).resolve().parent / "testdata" / "astroved"
+
+# What scrape_horoscope() returns for a good day
+RESULTS = [{"sign": sign.capitalize(), "horoscope": {"General": f"{sign} reading"}} for sign in SIGNS]
+
+
+def wait_for(predicate, timeout=5):
+    """ Poll until predicate() holds, for work running on the scraper loop """
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the scraper loop")
+        time.sleep(0.01)
+
+
+class MockedScraperMixin:
+    """
+    A HoroscopeCache whose scraper and horoscopes table are mocks; the
+    periodic refresher is not started
+    """
+
+    def make_cache(self, stored=()):
+        cache = HoroscopeCache(max_age=60, refresh_interval=3600)
+        self.scrape_horoscope = mock.AsyncMock(return_value=RESULTS)
+        self.scrape_sign = mock.AsyncMock(side_effect=lambda sign: RESULTS[SIGNS.index(sign.lower())])
+        self.load_day = mock.Mock(return_value=list(stored))
+        self.save_day = mock.Mock(side_effect=lambda results, day: [result["sign"].lower() for result in results])
+        for patcher in (
+            mock.patch.object(cache, "start_refresher"),
+            mock.patch("horoscope.cache.scrape_horoscope", self.scrape_horoscope),
+            mock.patch("horoscope.cache.scrape_sign", self.scrape_sign),
+            mock.patch("horoscope.cache.safe_load_day", self.load_day),
+            mock.patch("horoscope.cache.save_day_in_background", self.save_day),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return cache
+
+
+class GoldenCorpusTests(SimpleTestCase):
+    """ Saved astroved pages must parse identically with every parser backend """
+
+    def parse(self, path):
+        html = path.read_text(encoding="utf-8")
+        if path.name == "index.html":
+            return parse_horoscope_links(html)
+        return parse_horoscope_details(html, path.stem.capitalize())
+
+    def test_backends_match_golden_output(self):
+        pages = sorted(TESTDATA.glob("*.html"))
+        self.assertTrue(pages)
+        for parser in ("html.parser", "lxml"):
+            for page in pages:
+                with self.subTest(parser=parser, page=page.name), override_settings(HTML_PARSER=parser):
+                    expected = json.loads(page.with_suffix(".json").read_text(encoding="utf-8"))
+                    self.assertEqual(self.parse(page), expected)
+
+
+class HoroscopeCacheTests(MockedScraperMixin, SimpleTestCase):
+    def test_cold_cache_scrapes_once_then_hits(self):
+        cache = self.make_cache()
+        self.assertEqual(cache.get_all(), (RESULTS, MISS, 0))
+
+        results, status, age = cache.get_all()
+        self.assertEqual((results, status), (RESULTS, HIT))
+        self.assertLess(age, 60)
+        self.assertEqual(self.scrape_horoscope.await_count, 1)
+
+    def test_old_data_is_served_stale_while_refreshing(self):
+        cache = self.make_cache()
+        cache.get_all()
+        cache._fetched_at[timezone.localdate()] -= 120
+
+        results, status, age = cache.get_all()
+        self.assertEqual((results, status), (RESULTS, STALE))
+        self.assertGreaterEqual(age, 120)
+
+        wait_for(lambda: self.scrape_horoscope.await_count == 2 and cache._inflight.done())
+        self.assertEqual(cache.get_all()[1], HIT)
+
+    def test_previous_day_is_served_stale_after_rollover(self):
+        cache = self.make_cache()
+        cache.store(RESULTS, timezone.localdate() - timedelta(days=1))
+
+        self.assertEqual(cache.get_all()[:2], (RESULTS, STALE))
+        wait_for(lambda: self.scrape_horoscope.await_count == 1 and cache._inflight.done())
+        self.assertEqual(cache.get_all()[:2], (RESULTS, HIT))
+
+    def test_cold_cache_is_filled_from_the_table(self):
+        cache = self.make_cache(stored=RESULTS)
+        self.assertEqual(cache.get_all()[:2], (RESULTS, HIT))
+        self.scrape_horoscope.assert_not_awaited()
+
+    def test_failed_scrape_is_a_miss_with_an_error(self):
+        cache = self.make_cache()
+        self.scrape_horoscope.return_value = {"error": "Failed to fetch main horoscope page"}
+        self.assertEqual(cache.get_all(), ({"error": "Failed to fetch main horoscope page"}, MISS, 0))
+
+
+class HoroscopeViewTests(MockedScraperMixin, SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch("horoscope.views.horoscope_cache", self.make_cache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cache_status_and_age_headers(self):
+        response = self.client.get("/api/v1/horoscope/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), RESULTS)
+        self.assertEqual((response["X-Cache"], response["Age"]), (MISS, "0"))
+
+        response = self.client.get("/api/v1/horoscope/")
+        self.assertEqual(response["X-Cache"], HIT)
+        self.assertEqual(self.scrape_horoscope.await_count, 1)
+
+    def test_sign_is_fetched_on_its_own(self):
+        response = self.client.get("/api/v1/horoscope/Leo/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), RESULTS[SIGNS.index("leo")])
+        self.assertEqual(response["X-Cache"], MISS)
+        self.scrape_sign.assert_awaited_once_with("Leo")
+        self.scrape_horoscope.assert_not_awaited()
+
+        self.assertEqual(self.client.get("/api/v1/horoscope/leo/")["X-Cache"], HIT)
+        self.assertEqual(self.scrape_sign.await_count, 1)
+
+    def test_unknown_sign_is_404(self):
+        response = self.client.get("/api/v1/horoscope/ophiuchus/")
+        self.assertEqual(response.status_code, 404)
+        self.scrape_sign.assert_not_awaited()
+
+    def test_failed_sign_scrape_is_502(self):
+        self.scrape_sign.side_effect = None
+        self.scrape_sign.return_value = {"sign": "Leo", "error": "Failed to fetch Leo horoscope"}
+        response = self.client.get("/api/v1/horoscope/leo/")
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(response["X-Cache"], MISS)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        self.flights = SingleFlight()
+        self.calls = 0
+
+    async def work(self, value):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def test_concurrent_calls_share_one_run(self):
+        async def run():
+            return await asyncio.gather(*(self.flights.do("key", self.work, "result") for _ in range(5)))
+
+        self.assertEqual(asyncio.run(run()), ["result"] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.flights.stats, {"started": 1, "shared": 4})
+
+    def test_keys_are_independent_and_forgotten_when_done(self):
+        async def run():
+            first = await asyncio.gather(self.flights.do("a", self.work, 1), self.flights.do("b", self.work, 2))
+            self.assertFalse(self.flights.in_flight("a"))
+            return first, await self.flights.do("a", self.work, 3)
+
+        self.assertEqual(asyncio.run(run()), ([1, 2], 3))
+        self.assertEqual(self.calls, 3)
+
+    def test_errors_reach_every_waiter(self):
+        async def run():
+            return await asyncio.gather(
+                *(self.flights.do("key", self.work, ValueError("upstream")) for _ in range(3)),
+                return_exceptions=True,
+            )
+
+        errors = asyncio.run(run())
+        self.assertEqual([str(error) for error in errors], ["upstream"] * 3)
+        self.assertEqual(self.calls, 1)
+
+    def test_cancelled_waiter_does_not_cancel_the_shared_call(self):
+        async def run():
+            first = asyncio.ensure_future(self.flights.do("key", self.work, "result"))
+            second = asyncio.ensure_future(self.flights.do("key", self.work, "result"))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(run()), "result")
+        self.assertEqual(self.calls, 1)
+
+
+class HoroscopeStoreTests(TestCase):
+    day = timezone.localdate() - timedelta(days=3)
+
+    def test_save_and_load_a_day(self):
+        readings = [{"sign": "Leo", "horoscope": {"Love": "leo love", "Career": "leo career"}}, *RESULTS[:2]]
+        failed = {"sign": "Virgo", "error": "Failed to fetch Virgo horoscope"}
+
+        self.assertEqual(save_day(readings + [failed], self.day), ["leo", "aries", "taurus"])
+        # Rows are written once per day; saving again changes nothing
+        save_day(readings, self.day)
+        self.assertEqual(Horoscope.objects.filter(date=self.day).count(), 4)
+
+        self.assertEqual(load_day(self.day), [*RESULTS[:2], readings[0]])
+        self.assertEqual(list(load_day(self.day, ["Leo"])[0]["horoscope"]), ["Love", "Career"])
+        self.assertEqual(load_day(self.day + timedelta(days=1)), [])
+
+    def test_history_is_served_from_the_table(self):
+        save_day(RESULTS, self.day)
+
+        response = self.client.get(f"/api/v1/horoscope/?date={self.day}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), RESULTS)
+        self.assertNotIn("X-Cache", response)
+
+        response = self.client.get(f"/api/v1/horoscope/gemini/?date={self.day}")
+        self.assertEqual(response.json(), RESULTS[2])
+
+    def test_missing_or_invalid_history_date(self):
+        self.assertEqual(self.client.get(f"/api/v1/horoscope/?date={self.day}").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/v1/horoscope/leo/?date={self.day}").status_code, 404)
+        self.assertEqual(self.client.get("/api/v1/horoscope/?date=yesterday").status_code, 400)
+        self.assertEqual(self.client.get("/api/v1/horoscope/?date=2025-02-30").status_code, 400)
+
+
+class HoroscopePersistenceTests(MockedScraperMixin, SimpleTestCase):
+    def test_each_sign_is_saved_once_per_day(self):
+        cache = self.make_cache()
+        cache.get_all()
+        cache.refresh()
+
+        self.save_day.assert_called_once_with(RESULTS, timezone.localdate())
+
+    def test_background_saves_recycle_the_connection(self):
+        with mock.patch("horoscope.store.close_old_connections") as close_old_connections, mock.patch(
+            "horoscope.store.safe_save_day", return_value=["aries"]
+        ) as safe_save_day:
+            self.assertEqual(save_day_in_background(RESULTS[:1], timezone.localdate()), ["aries"])
+
+        safe_save_day.assert_called_once()
+        self.assertEqual(close_old_connections.call_count, 2)
+
+
+class MetricsViewTests(SimpleTestCase):
+    """ /metrics needs the bearer token, whatever address the request comes from """
+
+    @override_settings(METRICS_TOKEN="")
+    def test_disabled_without_a_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_requires_the_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import HoroscopeAPIView
+from .views import HoroscopeAPIView, HoroscopeSignAPIView
 
 urlpatterns = [
     path("horoscope/", HoroscopeAPIView.as_view(), name="horoscope-api"),
+    path("horoscope/<str:sign>/", HoroscopeSignAPIView.as_view(), name="horoscope-sign"),
 ]
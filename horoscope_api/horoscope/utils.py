@@ -1,53 +1,101 @@
-import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
+import time
+from django.utils import timezone
+from horoscope_api.metrics import FETCH_BYTES, FETCHES, PARSE_FAILURES, STAGE_SECONDS, fetch_outcome
+from horoscope_api.parsing import make_soup
+from .session import get_session
+from .singleflight import SingleFlight
 
 BASE_URL = "https://www.astroved.com"
 
+# Concurrent scrapes for the same day (and details for the same sign and day)
+# share one upstream fetch
+scrape_flights = SingleFlight()
+
+SIGNS = (
+    "aries", "taurus", "gemini", "cancer", "leo", "virgo",
+    "libra", "scorpio", "sagittarius", "capricorn", "aquarius", "pisces",
+)
+
+def sign_url(sign):
+    """ Daily horoscope page of one sign; the same URL the index page links to """
+    return f"{BASE_URL}/horoscopes/daily-horoscope/{sign.lower()}"
+
 async def fetch(session, url):
     """ Fetch page content asynchronously """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
-    }
-    async with session.get(url, headers=headers) as response:
-        return await response.text() if response.status == 200 else None
-
-async def scrape_horoscope():
-    """ Scrapes all horoscope links and their details asynchronously """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        async with session.get(url) as response:
+            outcome = fetch_outcome(response.status)
+            if response.status != 200:
+                return None
+            body = await response.text()
+            FETCH_BYTES.inc(len(body), source="astroved")
+            return body
+    finally:
+        FETCHES.inc(source="astroved", outcome=outcome)
+        STAGE_SECONDS.observe(time.perf_counter() - started, source="astroved", stage="fetch")
+
+async def scrape_horoscope(session=None):
+    """
+    Scrapes all horoscope links and their details asynchronously.
+    Uses the process-wide session (see session.py) unless one is given.
+    Concurrent calls on the same day share a single scrape.
+    """
+    day = timezone.localdate()
+    return await scrape_flights.do(("all", day), _scrape_horoscope, session or get_session())
+
+async def _scrape_horoscope(session):
     url = f"{BASE_URL}/horoscope/"
 
-    print("url",url)
-    async with aiohttp.ClientSession() as session:
-        page_content = await fetch(session, url)
-
-        if not page_content:
-            return {"error": "Failed to fetch main horoscope page"}
+    page_content = await fetch(session, url)
 
-        soup = BeautifulSoup(page_content, "html.parser")
+    if not page_content:
+        return {"error": "Failed to fetch main horoscope page"}
 
-        # Extract all horoscope sign links
-        horoscope_links = [a["href"] for a in soup.find_all("a", href=True) if "/horoscopes/daily-horoscope/" in a["href"]]
+    horoscope_links = parse_horoscope_links(page_content)
 
-        # Create tasks for concurrent fetching
-        tasks = [scrape_horoscope_details(session, f"{BASE_URL}{link}", link.split("/")[-1].capitalize()) for link in horoscope_links]
+    # Create tasks for concurrent fetching
+    tasks = [scrape_horoscope_details(session, f"{BASE_URL}{link}", link.split("/")[-1].capitalize()) for link in horoscope_links]
 
-        # Run tasks concurrently
-        results = await asyncio.gather(*tasks)
+    # Run tasks concurrently
+    results = await asyncio.gather(*tasks)
 
-        return results
+    return results
 
 async def scrape_horoscope_details(session, url, sign_name):
-    """ Fetches detailed horoscope information asynchronously """
+    """ Fetches detailed horoscope information asynchronously, one in-flight fetch per sign and day """
+    day = timezone.localdate()
+    return await scrape_flights.do((sign_name.lower(), day), _scrape_horoscope_details, session, url, sign_name)
+
+async def scrape_sign(sign, session=None):
+    """ Fetches one sign straight from its known URL, skipping the index page """
+    return await scrape_horoscope_details(session or get_session(), sign_url(sign), sign.capitalize())
+
+async def _scrape_horoscope_details(session, url, sign_name):
     page_content = await fetch(session, url)
 
     if not page_content:
         return {"sign": sign_name, "error": f"Failed to fetch {sign_name} horoscope"}
 
-    soup = BeautifulSoup(page_content, "html.parser")
-    
+    return parse_horoscope_details(page_content, sign_name)
+
+@STAGE_SECONDS.timed(source="astroved", stage="parse_index")
+def parse_horoscope_links(page_content):
+    """ Extracts all horoscope sign links from the main horoscope page """
+    soup = make_soup(page_content)
+    return [a["href"] for a in soup.find_all("a", href=True) if "/horoscopes/daily-horoscope/" in a["href"]]
+
+@STAGE_SECONDS.timed(source="astroved", stage="parse_details")
+def parse_horoscope_details(page_content, sign_name):
+    """ Parses the horoscope categories out of a sign page """
+    soup = make_soup(page_content)
+
     horoscope_section = soup.find("div", class_="horo-title")
 
     if not horoscope_section:
+        PARSE_FAILURES.inc(source="astroved", kind="details")
         return {"sign": sign_name, "status": "fail", "message": "Horoscope section not found"}
 
     result = {"sign": sign_name, "horoscope": {}}
@@ -1,14 +1,74 @@
-import asyncio
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from .utils import scrape_horoscope
-
-class HoroscopeAPIView(APIView):
-    """ DRF API View to return horoscope data """
-
-    def get(self, request):
-        """ Handles GET request for horoscope data """
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(scrape_horoscope())
-        return Response(result)
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views import View
+from .cache import horoscope_cache
+from .store import load_day
+from .utils import SIGNS
+
+
+def requested_date(request):
+    """ The ?date=YYYY-MM-DD parameter, today when absent, None when invalid """
+    value = request.GET.get("date")
+    if not value:
+        return timezone.localdate()
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+class HoroscopeAPIView(View):
+    """
+    Async API view returning horoscope data. Served natively under ASGI
+    (horoscope_api/asgi.py); DRF's APIView has no async handlers, so this is a
+    plain Django view.
+    """
+
+    async def get(self, request):
+        """
+        Handles GET request for horoscope data. Today is served from the
+        horoscope cache; past days (?date=YYYY-MM-DD) from the stored history.
+        """
+        day = requested_date(request)
+        if day is None:
+            return JsonResponse({"error": "date must be YYYY-MM-DD."}, status=400)
+
+        if day != timezone.localdate():
+            result = await sync_to_async(load_day)(day)
+            if not result:
+                return JsonResponse({"error": f"No horoscopes stored for {day}."}, status=404)
+            return JsonResponse(result, safe=False)
+
+        result, cache_status, age = await horoscope_cache.aget_all()
+        response = JsonResponse(result, safe=False)
+        response["X-Cache"] = cache_status
+        response["Age"] = str(int(age))
+        return response
+
+
+class HoroscopeSignAPIView(View):
+    """ Async API view returning the horoscope of a single sign """
+
+    async def get(self, request, sign):
+        """ Handles GET request for one sign; only that sign's page is fetched upstream """
+        sign = sign.lower()
+        if sign not in SIGNS:
+            return JsonResponse({"error": f"Unknown sign '{sign}'."}, status=404)
+
+        day = requested_date(request)
+        if day is None:
+            return JsonResponse({"error": "date must be YYYY-MM-DD."}, status=400)
+
+        if day != timezone.localdate():
+            result = await sync_to_async(load_day)(day, [sign])
+            if not result:
+                return JsonResponse({"error": f"No {sign} horoscope stored for {day}."}, status=404)
+            return JsonResponse(result[0])
+
+        result, cache_status, age = await horoscope_cache.aget_sign(sign.capitalize())
+        response = JsonResponse(result, status=200 if "horoscope" in result else 502)
+        response["X-Cache"] = cache_status
+        response["Age"] = str(int(age))
+        return response
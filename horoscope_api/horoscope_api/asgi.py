@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+The horoscope API is an async view; serve it natively with an ASGI server,
+e.g. ``uvicorn horoscope_api.asgi:application``.
 """
 
 import os
@@ -14,3 +17,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'horoscope_api.settings')
 
 application = get_asgi_application()
+
+# Pre-warm the horoscope cache in serving processes only (not in manage.py commands)
+from horoscope.cache import horoscope_cache  # noqa: E402
+
+horoscope_cache.start_refresher()
@@ -0,0 +1,17 @@
+"""
+Settings for running benchmark_pipeline against a local SQLite file instead
+of Postgres:
+
+    python manage.py benchmark_pipeline --settings=horoscope_api.benchmark_settings
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("BENCHMARK_SQLITE_PATH", str(BASE_DIR / "benchmark.sqlite3")),
+    }
+}
+
+SULEKHA_PAGE_CACHE_DIR = ""
@@ -0,0 +1,267 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+A small dependency-free subset of prometheus_client: labelled counters and
+histograms in a process-wide registry. The web process serves them on
+/metrics (see views.metrics) and crawl_worker can serve its own with
+--metrics-port. Sharded crawl children send a snapshot() of their registry
+back to the parent, which merge()s it.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def merge(self, samples):
+        with self._lock:
+            for key, value in samples:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0) + value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """ with HISTOGRAM.time(stage="parse"): ... """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, **labels):
+        """ Decorator form of time() with fixed labels """
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def stats(self, **labels):
+        """ {"count": n, "sum": seconds} for one label set """
+        state = self._values.get(self._key(labels))
+        return {"count": state["count"], "sum": state["sum"]} if state else {"count": 0, "sum": 0.0}
+
+    def _render_sample(self, key, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, state["counts"]):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key, ("le", "+Inf"))
+        lines.append(f"{self.name}_bucket{labels} {state['count']}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state['count']}")
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                [list(key), {"counts": list(state["counts"]), "sum": state["sum"], "count": state["count"]}]
+                for key, state in self._values.items()
+            ]
+
+    def merge(self, samples):
+        with self._lock:
+            for key, incoming in samples:
+                key = tuple(key)
+                state = self._values.get(key)
+                if state is None:
+                    state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                state["counts"] = [a + b for a, b in zip(state["counts"], incoming["counts"])]
+                state["sum"] += incoming["sum"]
+                state["count"] += incoming["count"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self):
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """ Picklable copy of every sample, for merge() in another process """
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def merge(self, snapshot):
+        for name, samples in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.merge(samples)
+
+    def clear(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+# Shared scraper metrics; source is "sulekha" or "astroved"
+FETCHES = Counter(
+    "scraper_fetches_total", "Upstream page fetches by outcome", ["source", "outcome"]
+)
+FETCH_BYTES = Counter(
+    "scraper_fetch_bytes_total", "Bytes of page bodies downloaded", ["source"]
+)
+STAGE_SECONDS = Histogram(
+    "scraper_stage_seconds", "Time spent per scraper stage (fetch, parse, extract_*, db_write)", ["source", "stage"]
+)
+PARSE_FAILURES = Counter(
+    "scraper_parse_failures_total", "Pages or cards that could not be parsed", ["source", "kind"]
+)
+PAGE_CACHE = Counter(
+    "scraper_page_cache_total", "Page cache lookups by result", ["result"]
+)
+DETAIL_PAGES = Counter(
+    "scraper_detail_pages_total", "Event detail pages fetched, or reused from stored rows by incremental crawls", ["result"]
+)
+DETAIL_MEMO = Counter(
+    "scraper_detail_memo_total", "Per-crawl event detail memo lookups (hits, misses, shared, evictions)", ["result"]
+)
+METRO_SECONDS = Histogram(
+    "crawl_metro_seconds", "Time per metro for scraping and ingestion", ["metro", "stage"]
+)
+ROWS_WRITTEN = Counter(
+    "events_rows_total", "CommunityEvents rows by ingest outcome", ["outcome"]
+)
+
+
+def fetch_outcome(status):
+    """ outcome label of scraper_fetches_total for an HTTP status """
+    if status == 304:
+        return "not_modified"
+    if status >= 400:
+        return f"http_{status // 100}xx"
+    return "ok"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port, address="127.0.0.1"):
+    """ Serve /metrics from a daemon thread, for processes without Django views """
+    server = ThreadingHTTPServer((address, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
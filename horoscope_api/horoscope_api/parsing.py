@@ -0,0 +1,55 @@
+"""
+HTML parsing helpers shared by the scrapers.
+
+The BeautifulSoup backend is chosen by the HTML_PARSER setting ("lxml" or
+"html.parser"), falling back to the pure-Python parser when lxml is not
+installed. `manage.py benchmark_parsers` measured lxml at about 1.05x on the
+small saved pages, where selector matching dominates, and about 1.4x on a
+260 KB listing. CSS selectors are compiled once per process instead of being
+looked up on every call.
+"""
+
+import logging
+from functools import lru_cache
+
+import soupsieve
+from bs4 import BeautifulSoup
+from bs4.builder import builder_registry
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARSER = "lxml"
+FALLBACK_PARSER = "html.parser"
+
+
+@lru_cache(maxsize=None)
+def _available(parser):
+    if builder_registry.lookup(parser) is not None:
+        return parser
+    logger.warning(f"HTML parser {parser!r} is not installed, using {FALLBACK_PARSER!r}")
+    return FALLBACK_PARSER
+
+
+def get_parser():
+    """ BeautifulSoup backend configured for this process """
+    return _available(getattr(settings, "HTML_PARSER", DEFAULT_PARSER))
+
+
+def make_soup(html, parser=None):
+    return BeautifulSoup(html, _available(parser) if parser else get_parser())
+
+
+@lru_cache(maxsize=None)
+def compile_selector(selector):
+    return soupsieve.compile(selector)
+
+
+def select_one(node, selector):
+    """ node.select_one(selector) with the selector compiled once """
+    return compile_selector(selector).select_one(node)
+
+
+def select(node, selector):
+    """ node.select(selector) with the selector compiled once """
+    return compile_selector(selector).select(node)
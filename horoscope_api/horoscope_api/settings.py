@@ -136,6 +136,46 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# BeautifulSoup backend for the scrapers (horoscope_api.parsing): "lxml" or "html.parser"
+HTML_PARSER = os.environ.get("HTML_PARSER", "lxml")
+
+# Horoscope cache (horoscope.cache): data older than HOROSCOPE_CACHE_MAX_AGE seconds
+# is served as stale while a refresh runs; all signs are re-scraped every
+# HOROSCOPE_REFRESH_INTERVAL seconds
+HOROSCOPE_CACHE_MAX_AGE = int(os.environ.get("HOROSCOPE_CACHE_MAX_AGE", 60 * 60))
+HOROSCOPE_REFRESH_INTERVAL = int(os.environ.get("HOROSCOPE_REFRESH_INTERVAL", 60 * 60))
+
+# On-disk conditional-GET cache for scraped Sulekha pages (eventsapp.page_cache).
+# Set SULEKHA_PAGE_CACHE_DIR to an empty string to disable it.
+SULEKHA_PAGE_CACHE_DIR = os.environ.get("SULEKHA_PAGE_CACHE_DIR", str(BASE_DIR / ".page_cache"))
+SULEKHA_PAGE_CACHE_TTL = int(os.environ.get("SULEKHA_PAGE_CACHE_TTL", 6 * 60 * 60))
+SULEKHA_PAGE_CACHE_MAX_BYTES = int(os.environ.get("SULEKHA_PAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Crawler processes used by crawl jobs; metros are sharded across them and the
+# job process stays the only database writer (eventsapp.sharding)
+EVENTS_CRAWL_PROCESSES = int(os.environ.get("EVENTS_CRAWL_PROCESSES", 1))
+
+# Incremental crawls only fetch detail pages of new or changed event cards and
+# reuse the stored details of the rest (eventsapp.incremental); set to 0 to
+# fetch every detail page
+EVENTS_CRAWL_INCREMENTAL = os.environ.get("EVENTS_CRAWL_INCREMENTAL", "1") == "1"
+
+# A running crawl job's worker bumps its heartbeat every
+# EVENTS_CRAWL_JOB_HEARTBEAT seconds; running jobs without one for
+# EVENTS_CRAWL_JOB_STALE_AFTER seconds (a killed worker) are marked failed
+EVENTS_CRAWL_JOB_HEARTBEAT = int(os.environ.get("EVENTS_CRAWL_JOB_HEARTBEAT", 30))
+EVENTS_CRAWL_JOB_STALE_AFTER = int(os.environ.get("EVENTS_CRAWL_JOB_STALE_AFTER", 10 * 60))
+
+# Seconds before the in-process Mastercity index (eventsapp.city_index) reloads
+MASTERCITY_INDEX_TTL = int(os.environ.get("MASTERCITY_INDEX_TTL", 60 * 60))
+
+# Bearer token required by /metrics; without one the endpoint is off and
+# metrics are only served by start_metrics_server (crawl_worker --metrics-port)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Creates the unmanaged models' tables in the test database
+TEST_RUNNER = "horoscope_api.test_runner.UnmanagedModelTestRunner"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -0,0 +1,21 @@
+from django.apps import apps
+from django.test.runner import DiscoverRunner
+
+
+class UnmanagedModelTestRunner(DiscoverRunner):
+    """
+    Creates the tables of the unmanaged models in the test databases. Their
+    schema lives in the apps' sql/ scripts rather than in migrations, so the
+    default runner would leave them out.
+    """
+
+    def setup_databases(self, **kwargs):
+        old_config = super().setup_databases(**kwargs)
+        unmanaged = [model for model in apps.get_models() if not model._meta.managed]
+        for connection, _, _ in old_config:
+            existing = set(connection.introspection.table_names())
+            with connection.schema_editor() as editor:
+                for model in unmanaged:
+                    if model._meta.db_table not in existing:
+                        editor.create_model(model)
+        return old_config
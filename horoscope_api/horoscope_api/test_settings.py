@@ -0,0 +1,17 @@
+"""
+Settings for the test suite: an SQLite test database, so the tests run
+without Postgres. manage.py uses them for the test command:
+
+    python manage.py test
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": str(BASE_DIR / "test.sqlite3"),
+    }
+}
+
+SULEKHA_PAGE_CACHE_DIR = ""
@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
+from . import views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/v1/", include("horoscope.urls")),  
     path("api/v1/", include("eventsapp.urls")),  
+    path("metrics", views.metrics, name="metrics"),
 ]
@@ -0,0 +1,19 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound
+
+from .metrics import CONTENT_TYPE, REGISTRY
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint; needs "Authorization: Bearer <METRICS_TOKEN>"
+    and is disabled when METRICS_TOKEN is not set
+    """
+    if not settings.METRICS_TOKEN:
+        return HttpResponseNotFound("Not Found")
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not hmac.compare_digest(request.META.get("HTTP_AUTHORIZATION", "").encode(), expected.encode()):
+        return HttpResponseForbidden("Forbidden")
+    return HttpResponse(REGISTRY.render(), content_type=CONTENT_TYPE)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'horoscope_api.settings')
 
 application = get_wsgi_application()
+
+# Pre-warm the horoscope cache in serving processes only (not in manage.py commands)
+from horoscope.cache import horoscope_cache  # noqa: E402
+
+horoscope_cache.start_refresher()
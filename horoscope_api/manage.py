@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'horoscope_api.settings')
+    # The test suite runs on SQLite (see horoscope_api/test_settings.py)
+    default_settings = 'horoscope_api.test_settings' if sys.argv[1:2] == ['test'] else 'horoscope_api.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', default_settings)
     try:
         from django.core.management import execute_from_command_line
         if len(sys.argv) > 1 and sys.argv[1] in ["makemigrations", "migrate"]: